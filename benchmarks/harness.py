@@ -0,0 +1,158 @@
+"""
+Per-endpoint latency and query count benchmark.
+
+Requests go through the full middleware and view stack with the test
+client, authenticated as one user. Each endpoint gets one warm-up
+request whose queries are counted, then timed requests from which
+latency percentiles are computed.
+"""
+import math
+import subprocess
+import time
+from django.conf import settings
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from bookmarks.models import BookmarkFolder
+from drf_api.middleware import QueryRecorder
+from posts.models import Post
+from profiles.models import Profile
+
+
+def endpoints_for(user):
+    """
+    The endpoints to benchmark, using ids of rows visible to user
+    """
+    post = Post.objects.order_by('-likes_count').first()
+    profile = Profile.objects.order_by('-followers_count').first()
+    folder = BookmarkFolder.objects.filter(owner=user).first()
+    post_ids = ','.join(
+        str(pk) for pk in Post.objects.values_list('pk', flat=True)[:50]
+    )
+    profile_ids = ','.join(
+        str(pk) for pk in Profile.objects.values_list('pk', flat=True)[:50]
+    )
+    endpoints = {
+        'posts': '/posts/',
+        'posts cursor': '/posts/?pagination=cursor',
+        'posts search': '/posts/?search=garden',
+        'posts sparse': '/posts/?fields=id,title',
+        'profiles': '/profiles/',
+        'comments': '/comments/',
+        'likes': '/likes/',
+        'followers': '/followers/',
+        'feed': '/feed/',
+        'tags': '/tags/',
+        'bookmarks': '/bookmarks/',
+        'viewer state': f'/me/state/?posts={post_ids}&profiles={profile_ids}',
+    }
+    if post:
+        endpoints['post detail'] = f'/posts/{post.pk}/'
+        endpoints['post comments'] = f'/comments/?post={post.pk}'
+    if profile:
+        endpoints['profile detail'] = f'/profiles/{profile.pk}/'
+    if folder:
+        endpoints['folder bookmarks'] = f'/folders/{folder.pk}/bookmarks/'
+    return endpoints
+
+
+def fetch(client, path):
+    """
+    Requests path, reading streamed bodies to the end
+    """
+    response = client.get(path, secure=True)
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    return response.status_code, size
+
+
+def percentile(sorted_values, percent):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def measure(client, path, iterations):
+    # Counted with an execute wrapper, as every request resets
+    # connection.queries_log
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        status, size = fetch(client, path)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fetch(client, path)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        'path': path,
+        'status': status,
+        'bytes': size,
+        'queries': len(recorder.queries),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p90_ms': round(percentile(latencies, 90), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(user, iterations=20, only=None):
+    """
+    Benchmarks every endpoint, or those named in only, as user
+    (anonymously when user is None)
+    """
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    endpoints = endpoints_for(user)
+    results = {}
+    # The test client's host is not one of the deployed hosts
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for name, path in endpoints.items():
+            if only and name not in only:
+                continue
+            results[name] = measure(client, path, iterations)
+    return {
+        'commit': current_commit(),
+        'created_at': timezone.now().isoformat(),
+        'database': connection.vendor,
+        'user': user.username if user else None,
+        'iterations': iterations,
+        'endpoints': results,
+    }
+
+
+def compare(previous, current):
+    """
+    Lines describing the change of each endpoint against a previous run
+    """
+    lines = []
+    for name, result in current['endpoints'].items():
+        before = previous['endpoints'].get(name)
+        if before is None:
+            continue
+        change = (result['p50_ms'] - before['p50_ms']) / max(
+            before['p50_ms'], 0.01
+        )
+        lines.append(
+            f'{name:<20} p50 {before["p50_ms"]:>8.2f} -> '
+            f'{result["p50_ms"]:>8.2f} ms ({change:+.0%}), '
+            f'queries {before["queries"]} -> {result["queries"]}'
+        )
+    return lines
@@ -0,0 +1,80 @@
+import time
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+
+class Command(BaseCommand):
+    """
+    Measures the database time of a minimal request, one query between
+    the request_started and request_finished signals Django uses to
+    open and close connections, with a new connection per request,
+    persistent connections and the configured DATABASES settings
+    """
+    help = 'Benchmark connection setup per request'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Number of requests per mode',
+        )
+
+    def measure(self, requests):
+        connections_opened = []
+
+        def count(sender, connection, **kwargs):
+            connections_opened.append(connection)
+
+        connection_created.connect(count)
+        start = time.perf_counter()
+        try:
+            for _ in range(requests):
+                request_started.send(sender=self.__class__)
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+                request_finished.send(sender=self.__class__)
+        finally:
+            connection_created.disconnect(count)
+        elapsed = time.perf_counter() - start
+        return elapsed, len(connections_opened)
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        settings_dict = connection.settings_dict
+        configured = {
+            'CONN_MAX_AGE': settings_dict['CONN_MAX_AGE'],
+            'CONN_HEALTH_CHECKS': settings_dict['CONN_HEALTH_CHECKS'],
+        }
+        modes = [('configured', configured)]
+        if 'pool' not in settings_dict['OPTIONS']:
+            # Pooled connections cannot be persistent
+            modes = [
+                ('connection per request', {
+                    'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False,
+                }),
+                ('persistent', {
+                    'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': False,
+                }),
+                ('persistent, health checks', {
+                    'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': True,
+                }),
+                *modes,
+            ]
+        self.stdout.write(
+            f'{"connections":<28}{"ms / request":>14}{"opened":>8}'
+        )
+        try:
+            for name, values in modes:
+                # Settings are read when connecting
+                connection.close()
+                settings_dict.update(values)
+                elapsed, opened = self.measure(requests)
+                self.stdout.write(
+                    f'{name:<28}{elapsed * 1e3 / requests:>14.3f}'
+                    f'{opened:>8}'
+                )
+        finally:
+            connection.close()
+            settings_dict.update(configured)
@@ -0,0 +1,77 @@
+import json
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from benchmarks.harness import compare, run
+
+
+class Command(BaseCommand):
+    """
+    Measures latency percentiles and query counts of the API endpoints
+    against the data in the database, see generate_benchmark_data, and
+    optionally saves them as JSON for comparing across commits
+    """
+    help = 'Benchmark API endpoint latency and query counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations', type=int, default=20,
+            help='Timed requests per endpoint',
+        )
+        parser.add_argument(
+            '--username',
+            help='User to authenticate as, defaults to the user '
+                 'following the most accounts',
+        )
+        parser.add_argument(
+            '--anonymous', action='store_true',
+            help='Send the requests logged out',
+        )
+        parser.add_argument(
+            '--endpoint', action='append', dest='endpoints',
+            help='Only benchmark this endpoint, may be repeated',
+        )
+        parser.add_argument('--output', help='Save the results to this file')
+        parser.add_argument(
+            '--compare', help='Compare with results saved by an earlier run'
+        )
+
+    def get_user(self, options):
+        if options['anonymous']:
+            return None
+        if options['username']:
+            try:
+                return User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(f'No user named {options["username"]}')
+        user = User.objects.order_by('-profile__following_count').first()
+        if user is None:
+            raise CommandError(
+                'The database has no users, run generate_benchmark_data'
+            )
+        return user
+
+    def handle(self, *args, **options):
+        results = run(
+            self.get_user(options),
+            iterations=options['iterations'],
+            only=options['endpoints'],
+        )
+        self.stdout.write(
+            f'{"endpoint":<20}{"status":>7}{"queries":>8}'
+            f'{"p50 ms":>9}{"p90 ms":>9}{"p99 ms":>9}'
+        )
+        for name, result in results['endpoints'].items():
+            self.stdout.write(
+                f'{name:<20}{result["status"]:>7}{result["queries"]:>8}'
+                f'{result["p50_ms"]:>9.2f}{result["p90_ms"]:>9.2f}'
+                f'{result["p99_ms"]:>9.2f}'
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f'Saved results to {options["output"]}')
+        if options['compare']:
+            with open(options['compare']) as previous:
+                for line in compare(json.load(previous), results):
+                    self.stdout.write(line)
@@ -0,0 +1,115 @@
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from drf_api.renderers import FastJSONRenderer, StreamingJSONRenderer
+
+
+def bookmark_representation(index):
+    """
+    A synthetic bookmark shaped like BookmarkSerializer output
+    """
+    return {
+        'id': index,
+        'owner': 'adam',
+        'post': {
+            'id': index,
+            'owner': f'user{index % 100}',
+            'is_owner': False,
+            'profile_id': index % 100,
+            'profile_image': (
+                'https://res.cloudinary.com/demo/image/upload/'
+                'default_profile_qdjgyp'
+            ),
+            'title': f'Post number {index}',
+            'content': 'Lorem ipsum dolor sit amet ' * 8,
+            'image': (
+                'https://res.cloudinary.com/demo/image/upload/'
+                'default_post_rgq6aq'
+            ),
+            'created_at': '01 Jan 2025',
+            'updated_at': '01 Jan 2025',
+            'like_id': index if index % 3 else None,
+            'likes_count': index % 50,
+            'comments_count': index % 7,
+            'tags': ['#nature', '#travel'],
+        },
+        'post_id': index,
+        'post_title': f'Post number {index}',
+        'post_owner': f'user{index % 100}',
+        'post_image': (
+            'https://res.cloudinary.com/demo/image/upload/default_post_rgq6aq'
+        ),
+        'folder': 1,
+        'folder_name': 'saved',
+        'created_at': '2025-01-01T00:00:00Z',
+    }
+
+
+def render_whole(renderer_class, count):
+    """
+    Builds the whole list and document at once, like Response does
+    """
+    data = {
+        'results': [bookmark_representation(i) for i in range(count)]
+    }
+    return len(renderer_class().render(data))
+
+
+def render_streamed(count):
+    """
+    Renders items as they are produced, discarding each sent chunk
+    """
+    items = (bookmark_representation(i) for i in range(count))
+    return sum(
+        len(chunk) for chunk in StreamingJSONRenderer().render_stream(items)
+    )
+
+
+class Command(BaseCommand):
+    """
+    Compares throughput and peak memory of the stock JSONRenderer with
+    FastJSONRenderer and StreamingJSONRenderer on a synthetic export of
+    bookmarks, without touching the database
+    """
+    help = 'Benchmark JSON renderers on a synthetic bookmarks export'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count', type=int, default=5000,
+            help='Number of bookmarks in the export',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Runs per renderer, the fastest is reported',
+        )
+
+    def measure(self, render, count, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            size = render(count)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        tracemalloc.start()
+        render(count)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return size, best, peak
+
+    def handle(self, *args, **options):
+        count, repeat = options['count'], options['repeat']
+        renderers = [
+            ('JSONRenderer', lambda n: render_whole(JSONRenderer, n)),
+            ('FastJSONRenderer', lambda n: render_whole(FastJSONRenderer, n)),
+            ('StreamingJSONRenderer', render_streamed),
+        ]
+        self.stdout.write(
+            f'{"renderer":<24}{"bytes":>12}{"MB/s":>10}{"peak MB":>10}'
+        )
+        for name, render in renderers:
+            size, elapsed, peak = self.measure(render, count, repeat)
+            self.stdout.write(
+                f'{name:<24}{size:>12}'
+                f'{size / elapsed / 1e6:>10.1f}{peak / 1e6:>10.1f}'
+            )
@@ -0,0 +1,112 @@
+import time
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from comments.models import Comment
+from comments.serializers import CommentSerializer
+from drf_api.images import (
+    ImageSrcsetField, image_storage, resolve_image_url
+)
+from profiles.models import Profile
+
+
+class UncachedImageSrcsetField(ImageSrcsetField):
+    def image_url(self, name):
+        return image_storage().url(name)
+
+
+class UncachedCommentSerializer(CommentSerializer):
+    """
+    CommentSerializer resolving every image URL through the storage
+    """
+    profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+    profile_image_srcset = UncachedImageSrcsetField(
+        source='owner.profile.image_variants'
+    )
+
+
+def build_comments(count, authors):
+    """
+    Unsaved comments shaped like a page of /comments/, written by a
+    handful of authors whose profiles have renditions
+    """
+    now = timezone.now()
+    owners = []
+    for index in range(authors):
+        owner = User(pk=index + 1, username=f'user{index}')
+        name = f'profiles/avatar{index}'
+        Profile(
+            pk=index + 1, owner=owner, image=f'{name}.jpg',
+            image_variants=[
+                {'size': size, 'type': media_type, 'width': width,
+                 'name': f'{name}_{size}.{extension}'}
+                for size, width in [('full', 1024), ('avatar', 128)]
+                for media_type, extension in [
+                    ('image/jpeg', 'jpeg'), ('image/webp', 'webp')
+                ]
+            ],
+        )
+        owners.append(owner)
+    return [
+        Comment(
+            pk=index + 1, owner=owners[index % authors], post_id=1,
+            content='Lorem ipsum dolor sit amet', depth=0, replies_count=0,
+            created_at=now, updated_at=now,
+        )
+        for index in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Compares the time CommentSerializer spends on a page of comments
+    with image URLs resolved by the storage on every row, and memoized
+    by drf_api.images.image_url, without touching the database
+    """
+    help = 'Benchmark image URL resolution when serializing comments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=1000,
+            help='Number of comments serialized per run',
+        )
+        parser.add_argument(
+            '--authors', type=int, default=10,
+            help='Number of distinct comment authors',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Runs per serializer, the fastest is reported',
+        )
+
+    def measure(self, serializer_class, comments, repeat, clear=False):
+        best = None
+        for _ in range(repeat):
+            if clear:
+                resolve_image_url.cache_clear()
+            # A new request for every run, as per request caches are
+            request = Request(APIRequestFactory().get('/comments/'))
+            request.user = AnonymousUser()
+            start = time.perf_counter()
+            serializer_class(
+                comments, many=True, context={'request': request}
+            ).data
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        comments = build_comments(rows, options['authors'])
+        runs = [
+            ('uncached', UncachedCommentSerializer, False),
+            ('memoized, cold process', CommentSerializer, True),
+            ('memoized, warm process', CommentSerializer, False),
+        ]
+        self.stdout.write(f'{"image urls":<26}{"ms / 1000 rows":>16}')
+        for name, serializer_class, clear in runs:
+            elapsed = self.measure(serializer_class, comments, repeat, clear)
+            self.stdout.write(f'{name:<26}{elapsed * 1e6 / rows:>16.1f}')
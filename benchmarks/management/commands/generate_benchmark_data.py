@@ -0,0 +1,48 @@
+from dataclasses import fields
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from benchmarks.synthetic import Scale, generate
+
+
+class Command(BaseCommand):
+    """
+    Fills the database with synthetic users, follows, posts, tags,
+    likes, comments and bookmarks for benchmark_endpoints
+    """
+    help = 'Generate synthetic data for benchmarking the API'
+
+    def add_arguments(self, parser):
+        for field in fields(Scale):
+            parser.add_argument(
+                f'--{field.name.replace("_", "-")}',
+                type=field.type, default=field.default,
+                help=f'Default {field.default}',
+            )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Allow writing to a database other than SQLite',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite' and not options['force']:
+            raise CommandError(
+                f'Refusing to write synthetic data to {connection.vendor}, '
+                'pass --force to do it anyway'
+            )
+        prefix = 'bench'
+        if User.objects.filter(
+            username__startswith=f'{prefix}{options["seed"]}_'
+        ).exists():
+            raise CommandError(
+                f'Data for seed {options["seed"]} already exists, '
+                'use another --seed'
+            )
+        scale = Scale(**{
+            field.name: options[field.name] for field in fields(Scale)
+        })
+        counts = generate(scale, seed=options['seed'], prefix=prefix)
+        self.stdout.write(', '.join(
+            f'{count} {name}' for name, count in counts.items()
+        ))
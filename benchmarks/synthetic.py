@@ -0,0 +1,190 @@
+"""
+Synthetic data for benchmarking the API at a configurable scale.
+
+Popularity follows a power law: users are followed, and tags used,
+with Zipf weights, so a few accounts have most of the followers like
+on a real social network. Rows are bulk inserted and the denormalized
+counters, search documents, tag usage and home feeds are rebuilt once
+at the end rather than through the per-row signals.
+"""
+import random
+from dataclasses import dataclass
+from io import StringIO
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import CharField, Count, Value
+from django.db.models.functions import Cast, Concat, LPad
+from django.utils import timezone
+from bookmarks.models import Bookmark, BookmarkFolder
+from comments.models import Comment
+from feed.utils import backfill_feed
+from followers.models import Follower
+from likes.models import Like
+from posts.models import Post, Tag, TagUsage
+from posts.trending import compact_tag_usage
+from profiles.models import Profile
+
+WORDS = (
+    'nature travel food recycle garden solar ocean forest compost bike '
+    'vegan zero waste thrift climate river mountain community repair'
+).split()
+
+
+@dataclass
+class Scale:
+    """
+    Size of the generated data set, per user or per post on average
+    """
+    users: int = 200
+    follows_per_user: int = 20
+    posts_per_user: int = 5
+    tags: int = 50
+    likes_per_post: int = 5
+    comments_per_post: int = 2
+    bookmarks_per_user: int = 10
+    exponent: float = 1.2
+
+
+def zipf_weights(count, exponent):
+    """
+    Weight of the item at each popularity rank
+    """
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def sentence(rng, length):
+    return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+
+def sample(rng, population, weights, count):
+    """
+    Up to count distinct items, drawn with the given weights
+    """
+    chosen = set()
+    for _ in range(count * 3):
+        if len(chosen) >= count:
+            break
+        chosen.add(rng.choices(population, weights)[0])
+    return chosen
+
+
+def generate(scale, seed=0, prefix='bench'):
+    """
+    Inserts a synthetic data set and returns the number of rows created
+    per model
+    """
+    rng = random.Random(seed)
+    password = make_password(None)
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(username=f'{prefix}{seed}_{index}', password=password)
+            for index in range(scale.users)
+        ])
+        Profile.objects.bulk_create([
+            Profile(owner=user, name=user.username) for user in users
+        ])
+
+        # A few users have most of the followers
+        by_popularity = rng.sample(users, len(users))
+        popularity = zipf_weights(len(users), scale.exponent)
+        follows = []
+        for user in users:
+            degree = rng.randint(1, 2 * scale.follows_per_user)
+            followed = sample(rng, by_popularity, popularity, degree)
+            follows.extend(
+                Follower(owner=user, followed=other)
+                for other in followed if other != user
+            )
+        Follower.objects.bulk_create(follows, ignore_conflicts=True)
+
+        Tag.objects.bulk_create(
+            [
+                Tag(name=f'{rng.choice(WORDS)}{index}')
+                for index in range(scale.tags)
+            ],
+            ignore_conflicts=True,
+        )
+        tags = list(Tag.objects.order_by('?')[:scale.tags])
+        tag_popularity = zipf_weights(len(tags), scale.exponent)
+
+        posts = Post.objects.bulk_create([
+            Post(
+                owner=user,
+                title=sentence(rng, 4)[:50],
+                content=sentence(rng, 30)[:300],
+            )
+            for user in users for _ in range(scale.posts_per_user)
+        ])
+        PostTag = Post.tags.through
+        PostTag.objects.bulk_create([
+            PostTag(post=post, tag=tag)
+            for post in posts
+            for tag in sample(rng, tags, tag_popularity, rng.randint(0, 3))
+        ], ignore_conflicts=True)
+
+        Like.objects.bulk_create([
+            Like(owner=user, post=post)
+            for post in posts
+            for user in rng.sample(
+                users,
+                min(len(users), rng.randint(0, 2 * scale.likes_per_post)),
+            )
+        ], ignore_conflicts=True)
+        Comment.objects.bulk_create([
+            Comment(
+                owner=rng.choice(users), post=post, content=sentence(rng, 12)
+            )
+            for post in posts
+            for _ in range(rng.randint(0, 2 * scale.comments_per_post))
+        ])
+        # Top level comments, whose path is their own padded id
+        Comment.objects.filter(post__in=posts, path='').update(path=Concat(
+            LPad(Cast('id', CharField()), Comment.PATH_STEP, Value('0')),
+            Value('/'),
+            output_field=CharField(),
+        ))
+
+        folders = BookmarkFolder.objects.bulk_create([
+            BookmarkFolder(owner=user, name=name)
+            for user in users for name in ('saved', 'later')
+        ])
+        Bookmark.objects.bulk_create([
+            Bookmark(owner=folder.owner, folder=folder, post=post)
+            for folder in folders
+            for post in rng.sample(
+                posts, min(len(posts), scale.bookmarks_per_user // 2)
+            )
+        ], ignore_conflicts=True)
+
+        TagUsage.objects.bulk_create([
+            TagUsage(tag_id=row['tag'], day=timezone.now().date(),
+                     count=row['total'])
+            for row in PostTag.objects.filter(
+                post__in=posts
+            ).values('tag').annotate(total=Count('pk'))
+        ], ignore_conflicts=True)
+
+    # Rebuild what the per-row signals and Post.save would maintain
+    output = StringIO()
+    call_command('sync_post_counters', stdout=output)
+    call_command('sync_profile_counters', stdout=output)
+    call_command('rebuild_post_search', stdout=output)
+    compact_tag_usage()
+    followed_ids = {}
+    for owner_id, followed_id in Follower.objects.filter(
+        owner__in=users
+    ).values_list('owner_id', 'followed_id'):
+        followed_ids.setdefault(owner_id, []).append(followed_id)
+    for owner_id, ids in followed_ids.items():
+        backfill_feed(owner_id, ids)
+
+    return {
+        'users': len(users),
+        'follows': Follower.objects.filter(owner__in=users).count(),
+        'posts': len(posts),
+        'likes': Like.objects.filter(post__in=posts).count(),
+        'comments': Comment.objects.filter(post__in=posts).count(),
+        'bookmarks': Bookmark.objects.filter(owner__in=users).count(),
+    }
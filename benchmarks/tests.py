@@ -0,0 +1,64 @@
+import json
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from followers.models import Follower
+from posts.models import Post
+from .harness import run
+from .synthetic import Scale, generate
+
+
+class SyntheticDataTests(TestCase):
+    def test_generates_the_requested_scale(self):
+        counts = generate(Scale(users=20, posts_per_user=2), seed=1)
+        self.assertEqual(counts['users'], 20)
+        self.assertEqual(counts['posts'], 40)
+        # Counters are rebuilt after the bulk inserts
+        post = Post.objects.order_by('-likes_count').first()
+        self.assertEqual(post.likes_count, post.likes.count())
+
+    def test_follow_graph_is_skewed_towards_a_few_users(self):
+        generate(Scale(users=50, follows_per_user=10), seed=2)
+        most_followed = User.objects.order_by(
+            '-profile__followers_count'
+        ).first()
+        followers = Follower.objects.filter(followed=most_followed).count()
+        self.assertGreater(followers, 2 * Follower.objects.count() / 50)
+
+
+class HarnessTests(TestCase):
+    def test_results_are_json_serializable(self):
+        generate(Scale(users=5, posts_per_user=1), seed=3)
+        user = User.objects.first()
+        results = run(user, iterations=2, only={'posts', 'profiles'})
+        self.assertEqual(set(results['endpoints']), {'posts', 'profiles'})
+        posts = results['endpoints']['posts']
+        self.assertEqual(posts['status'], 200)
+        self.assertGreater(posts['queries'], 0)
+        self.assertLessEqual(posts['p50_ms'], posts['p99_ms'])
+        json.dumps(results)
+
+
+class MediaURLBenchmarkTests(TestCase):
+    def test_reports_every_run_without_queries(self):
+        out = StringIO()
+        with self.assertNumQueries(0):
+            call_command(
+                'benchmark_media_urls', rows=20, repeat=1, stdout=out
+            )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].startswith('uncached'))
+
+
+class ConnectionBenchmarkTests(TestCase):
+    def test_restores_the_connection_settings(self):
+        settings_dict = dict(connection.settings_dict)
+        out = StringIO()
+        call_command('benchmark_connections', requests=3, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[1].startswith('connection per request'))
+        self.assertEqual(connection.settings_dict, settings_dict)
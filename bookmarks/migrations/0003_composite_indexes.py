@@ -0,0 +1,36 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookmarks', '0002_alter_bookmark_unique_together_and_more'),
+        ('posts', '0017_composite_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # Build the new indexes before dropping the FK indexes they replace
+    operations = [
+        migrations.AddIndex(
+            model_name='bookmark',
+            index=models.Index(fields=['owner', '-created_at'], name='bookmark_owner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookmark',
+            index=models.Index(fields=['folder', '-created_at'], name='bookmark_folder_created_idx'),
+        ),
+        migrations.AlterField(
+            model_name='bookmark',
+            name='folder',
+            field=models.ForeignKey(db_index=False, help_text='Folder containing the bookmark', on_delete=django.db.models.deletion.CASCADE, related_name='bookmarks', to='bookmarks.bookmarkfolder'),
+        ),
+        migrations.AlterField(
+            model_name='bookmark',
+            name='owner',
+            field=models.ForeignKey(db_index=False, help_text='User who created the bookmark', on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -21,6 +21,42 @@ class BookmarkFolder(models.Model):
         return f"{self.owner}'s folder: {self.name}"
 
 
+class BookmarkQuerySet(models.QuerySet):
+    """
+    QuerySet for bookmarks
+    """
+
+    def with_posts(self, user, fields=None, post_fields=None):
+        """
+        Loads owners and folders in the same query and the bookmarked
+        posts, with everything PostSerializer renders for user, in bulk.
+        fields and post_fields limit this to what the given
+        BookmarkSerializer and nested PostSerializer fields need, see
+        drf_api.fieldsets.
+        """
+        def wanted(*names):
+            return fields is None or not fields.isdisjoint(names)
+
+        related = []
+        if wanted('owner'):
+            related.append('owner')
+        if wanted('folder_name'):
+            related.append('folder')
+        queryset = self.select_related(*related) if related else self
+
+        if wanted('post'):
+            posts = Post.objects.for_feed(user, post_fields)
+        elif wanted('post_title', 'post_owner', 'post_image'):
+            posts = Post.objects.defer('search_document')
+        else:
+            return queryset
+        if wanted('post_owner'):
+            posts = posts.select_related('owner')
+        return queryset.prefetch_related(
+            models.Prefetch('post', queryset=posts)
+        )
+
+
 class Bookmark(models.Model):
     """
     Bookmark model for saving posts
@@ -35,6 +71,7 @@ class Bookmark(models.Model):
     owner = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        db_index=False,  # Indexed by bookmark_owner_created_idx
         help_text="User who created the bookmark"
     )
     post = models.ForeignKey(
@@ -47,6 +84,7 @@ class Bookmark(models.Model):
         BookmarkFolder,
         related_name='bookmarks',
         on_delete=models.CASCADE,
+        db_index=False,  # Indexed by bookmark_folder_created_idx
         help_text="Folder containing the bookmark"
     )
     created_at = models.DateTimeField(
@@ -54,6 +92,8 @@ class Bookmark(models.Model):
         help_text="Time when bookmark was created"
     )
 
+    objects = BookmarkQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         constraints = [
@@ -65,6 +105,17 @@ class Bookmark(models.Model):
                 )
             )
         ]
+        indexes = [
+            # A user's bookmarks and a folder's bookmarks, newest first
+            models.Index(
+                fields=['owner', '-created_at'],
+                name='bookmark_owner_created_idx',
+            ),
+            models.Index(
+                fields=['folder', '-created_at'],
+                name='bookmark_folder_created_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.owner} bookmarked {self.post} in {self.folder}"
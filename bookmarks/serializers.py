@@ -1,6 +1,9 @@
 from rest_framework import serializers
+from drf_api.fieldsets import SparseFieldsMixin
+from drf_api.images import ImageURLField
 from .models import BookmarkFolder, Bookmark
 from posts.models import Post
+from posts.serializers import PostSerializer
 
 
 class BookmarkFolderSerializer(serializers.ModelSerializer):
@@ -19,18 +22,19 @@ class BookmarkFolderSerializer(serializers.ModelSerializer):
         ]
 
 
-class BookmarkSerializer(serializers.ModelSerializer):
+class BookmarkSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for bookmarks.
     Handles bookmark creation, validation and proper data representation
     with complete post relationship details.
+    The nested post takes sparse fieldsets too, e.g. ?fields=id,post.title
     """
 
     owner = serializers.ReadOnlyField(source='owner.username')
     post_title = serializers.ReadOnlyField(source='post.title')
-    post_id = serializers.ReadOnlyField(source='post.id')
+    post_id = serializers.ReadOnlyField()
     post_owner = serializers.ReadOnlyField(source='post.owner.username')
-    post_image = serializers.ReadOnlyField(source='post.image.url')
+    post_image = ImageURLField(source='post.image')
     folder_name = serializers.ReadOnlyField(source='folder.name')
 
     class Meta:
@@ -47,25 +51,16 @@ class BookmarkSerializer(serializers.ModelSerializer):
         """
         Customize the output representation of the bookmark
         Ensures all required post data is correctly included for
-        the Post component
+        the Post component, using the same representation as the
+        posts endpoints. Load bookmarks with BookmarkQuerySet.with_posts
+        to avoid per-row queries.
         """
 
         representation = super().to_representation(instance)
-        representation['post'] = {
-            'id': instance.post.id,
-            'title': instance.post.title,
-            'content': instance.post.content,
-            'image': instance.post.image.url if instance.post.image else None,
-            'created_at': instance.post.created_at,
-            'updated_at': instance.post.updated_at,
-            'owner': instance.post.owner.username,
-            'profile_id': instance.post.owner.profile.id,
-            'profile_image': instance.post.owner.profile.image.url,
-            'likes_count': instance.post.likes.count(),
-            'comments_count': instance.post.comment_set.count(),
-            'like_id': None,
-            'is_owner': False
-        }
+        if 'post' in representation:
+            representation['post'] = PostSerializer(
+                instance.post, context=self.context, field_prefix='post'
+            ).data
 
         return representation
 
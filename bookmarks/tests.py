@@ -1,3 +1,97 @@
-from django.test import TestCase
+import json
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APITestCase
+from likes.models import Like
+from posts.models import Post, Tag
+from .models import Bookmark, BookmarkFolder
+from .serializers import BookmarkSerializer
+from .views import BookmarksInFolder
 
-# Create your tests here.
+
+class BookmarkViewTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.other = User.objects.create_user(username='brian', password='x')
+        self.folder = BookmarkFolder.objects.create(
+            owner=self.user, name='saved'
+        )
+        self.client.force_authenticate(user=self.user)
+        tag = Tag.objects.create(name='nature')
+        for index in range(10):
+            owner = self.user if index % 2 else self.other
+            post = Post.objects.create(owner=owner, title=f'post {index}')
+            post.tags.add(tag)
+            Like.objects.create(owner=self.user, post=post)
+            Bookmark.objects.create(
+                owner=self.user, post=post, folder=self.folder
+            )
+
+    def test_bookmark_list_loads_in_a_fixed_number_of_queries(self):
+        # page count, bookmarks with folders, posts, tags
+        with self.assertNumQueries(4):
+            response = self.client.get('/bookmarks/', secure=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def get_folder_bookmarks(self):
+        response = self.client.get(
+            f'/folders/{self.folder.id}/bookmarks/', secure=True
+        )
+        self.assertTrue(response.streaming)
+        return json.loads(b''.join(response.streaming_content))
+
+    def test_folder_bookmarks_load_in_a_fixed_number_of_queries(self):
+        # bookmarks with folders, posts, tags
+        with self.assertNumQueries(3):
+            data = self.get_folder_bookmarks()
+        self.assertEqual(len(data['results']), 10)
+
+    def test_folder_bookmarks_are_streamed_in_chunks(self):
+        with patch.object(BookmarksInFolder, 'stream_chunk_size', 4):
+            # bookmarks, then posts and tags for each of three chunks
+            with self.assertNumQueries(7):
+                data = self.get_folder_bookmarks()
+        response = self.client.get('/bookmarks/', secure=True)
+        self.assertEqual(data['results'], response.data['results'])
+
+    def test_folder_bookmarks_error_before_streaming(self):
+        with patch.object(
+            BookmarkSerializer, 'to_representation', side_effect=ValueError
+        ), self.assertLogs('bookmarks.views', 'ERROR'):
+            response = self.client.get(
+                f'/folders/{self.folder.id}/bookmarks/', secure=True
+            )
+        self.assertFalse(response.streaming)
+        self.assertEqual(
+            response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    def test_nested_post_matches_the_post_representation(self):
+        response = self.client.get('/bookmarks/', secure=True)
+        bookmark = response.data['results'][0]
+        post = Post.objects.get(pk=bookmark['post_id'])
+        like = Like.objects.get(owner=self.user, post=post)
+        self.assertEqual(bookmark['post']['like_id'], like.id)
+        self.assertEqual(bookmark['post']['is_owner'], post.owner == self.user)
+        self.assertEqual(bookmark['post']['likes_count'], 1)
+        self.assertEqual(bookmark['post']['tags'], ['#nature'])
+
+    def test_nested_post_fields_can_be_selected(self):
+        # page count, bookmarks, posts
+        with self.assertNumQueries(3):
+            response = self.client.get(
+                '/bookmarks/?fields=id,post.id,post.title', secure=True
+            )
+        bookmark = response.data['results'][0]
+        self.assertEqual(set(bookmark), {'id', 'post'})
+        self.assertEqual(set(bookmark['post']), {'id', 'title'})
+
+    def test_omitting_the_post_skips_loading_it(self):
+        # page count, bookmarks
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                '/bookmarks/?fields=id,post_id', secure=True
+            )
+        self.assertEqual(set(response.data['results'][0]), {'id', 'post_id'})
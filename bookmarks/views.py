@@ -1,17 +1,36 @@
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
 from rest_framework import generics, permissions, status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from django.db import IntegrityError
 from django.db.models import Count
 from django.core.exceptions import ValidationError
 from .models import BookmarkFolder, Bookmark
 from .serializers import BookmarkFolderSerializer, BookmarkSerializer
+from posts.serializers import PostSerializer
+from drf_api.fieldsets import selected_fields
 from drf_api.permissions import IsOwnerOrReadOnly
+from drf_api.pagination import FeedPagination
+from drf_api.renderers import StreamingJSONRenderer
 import logging
+from itertools import chain
 
 logger = logging.getLogger(__name__)
 
 
+def bookmarks_for(request):
+    """
+    The user's bookmarks, loading what the requested fields render
+    """
+    user = request.user
+    return Bookmark.objects.filter(owner=user).with_posts(
+        user,
+        selected_fields(request, BookmarkSerializer),
+        selected_fields(request, PostSerializer, 'post'),
+    )
+
+
 class BookmarkFolderList(generics.ListCreateAPIView):
     """
     Lists all bookmark folders for the authenticated user
@@ -80,10 +99,11 @@ class BookmarkList(generics.ListCreateAPIView):
     """
     serializer_class = BookmarkSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedPagination
 
     def get_queryset(self):
-        """Get all bookmarks for the current user"""
-        return Bookmark.objects.filter(owner=self.request.user)
+        """Get all bookmarks for the current user with their posts"""
+        return bookmarks_for(self.request)
 
     def create(self, request, *args, **kwargs):
         """
@@ -126,27 +146,42 @@ class BookmarksInFolder(generics.ListAPIView):
     """
     serializer_class = BookmarkSerializer
     permission_classes = [permissions.IsAuthenticated]
+    stream_chunk_size = 200
 
     def get_queryset(self):
         """
         Filter bookmarks by folder and owner
         """
         folder_id = self.kwargs.get('folder_id')
-        return Bookmark.objects.select_related(
-            'post',
-            'post__owner',
-            'folder'
-        ).filter(
-            folder_id=folder_id,
-            owner=self.request.user
+        return bookmarks_for(self.request).filter(
+            folder_id=folder_id
         ).order_by('-created_at')
 
     def list(self, request, *args, **kwargs):
         """
         Override list method to structure response properly
+        JSON is streamed from a server-side cursor as it is rendered,
+        in chunks of stream_chunk_size bookmarks with their posts.
+        Errors after the first chunk was sent can no longer change the
+        status, they end the response early with truncated JSON.
         """
         try:
             queryset = self.get_queryset()
+            if isinstance(request.accepted_renderer, JSONRenderer):
+                serializer = self.get_serializer(many=True)
+                items = (
+                    serializer.child.to_representation(bookmark)
+                    for bookmark in queryset.iterator(
+                        chunk_size=self.stream_chunk_size
+                    )
+                )
+                stream = StreamingJSONRenderer().render_stream(items)
+                # Rendered here, so that failing to run the query or
+                # serialize the first bookmarks still returns an error
+                first = next(stream)
+                return StreamingHttpResponse(
+                    chain([first], stream), content_type='application/json'
+                )
             serializer = self.get_serializer(queryset, many=True)
             return Response({
                 "results": serializer.data
@@ -169,7 +204,7 @@ class BookmarkDetail(generics.RetrieveDestroyAPIView):
 
     def get_queryset(self):
         """Ensure users can only access their own bookmarks"""
-        return Bookmark.objects.filter(owner=self.request.user)
+        return bookmarks_for(self.request)
 
     def perform_destroy(self, instance):
         """Custom destroy method to handle bookmark deletion"""
@@ -1,22 +1,148 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
 from posts.models import Post
+from drf_api.utils import adjust_counter, exclude_from_save
 
 # Create your models here.
 
 
+class CommentQuerySet(models.QuerySet):
+    """
+    QuerySet for comments
+    """
+
+    def for_display(self, user, fields=None, post_fields=None):
+        """
+        Loads everything CommentSerializer renders in a fixed number of
+        queries, limited to what the given fields need, see
+        drf_api.fieldsets. post_fields is passed when the post is
+        expanded and prefetches the posts for rendering them.
+        """
+        def wanted(*names):
+            return fields is None or not fields.isdisjoint(names)
+
+        queryset = self
+        if wanted('profile_id', 'profile_image', 'profile_image_srcset'):
+            queryset = queryset.select_related('owner__profile')
+        elif wanted('owner'):
+            queryset = queryset.select_related('owner')
+        if post_fields is not None:
+            queryset = queryset.prefetch_related(models.Prefetch(
+                'post', queryset=Post.objects.for_feed(user, post_fields)
+            ))
+        return queryset
+
+    def with_replies(self, user, limit, fields=None):
+        """
+        Prefetches the first limit direct replies of every comment, oldest
+        first, into loaded_replies with one query for the whole page
+        """
+        replies = Comment.objects.for_display(user, fields).order_by('path')
+        return self.prefetch_related(models.Prefetch(
+            'replies', queryset=replies[:limit], to_attr='loaded_replies'
+        ))
+
+
 class Comment(models.Model):
     """
     Comment model, related to User and Post
+    Replies point to their parent comment. path materializes the chain
+    of ancestor ids, zero padded so that ordering by path lists a thread
+    depth first in the order it was written, and a whole subtree is a
+    path prefix. replies_count counts direct replies and is kept in sync
+    by signals.
     """
     owner = models.ForeignKey(User, on_delete=models.CASCADE)
-    post = models.ForeignKey(Post, on_delete=models.CASCADE)
+    # Indexed by comment_post_created_idx
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, db_index=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     content = models.TextField()
+    parent = models.ForeignKey(
+        'self', related_name='replies', on_delete=models.CASCADE,
+        null=True, blank=True,
+    )
+    path = models.CharField(max_length=255, editable=False, default='')
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    replies_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = CommentQuerySet.as_manager()
+
+    # Maintained with adjust_counter only, never by saving the comment
+    counter_fields = ('replies_count',)
+
+    # Width of each id in path, and the deepest reply that still fits
+    PATH_STEP = 10
+    MAX_DEPTH = 255 // (PATH_STEP + 1) - 1
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # A post's comments, newest first
+            models.Index(
+                fields=['post', '-created_at'],
+                name='comment_post_created_idx',
+            ),
+            # Threads, as path prefixes within a post
+            models.Index(
+                fields=['post', 'path'], name='comment_post_path_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.content
+
+    def save(self, *args, **kwargs):
+        """
+        Sets depth and, once the comment has an id, its path
+        """
+        if self.parent_id and not self.path:
+            self.depth = self.parent.depth + 1
+        exclude_from_save(self, kwargs, self.counter_fields)
+        super().save(*args, **kwargs)
+        if not self.path:
+            prefix = self.parent.path if self.parent_id else ''
+            self.path = f'{prefix}{self.pk:0{self.PATH_STEP}d}/'
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
+
+    def descendants(self):
+        """
+        All replies under this comment, at any depth, depth first
+        """
+        return Comment.objects.filter(
+            post_id=self.post_id, path__startswith=self.path
+        ).exclude(pk=self.pk).order_by('path')
+
+
+def increment_comments_count(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter(
+            Post.objects.filter(pk=instance.post_id), 'comments_count', 1
+        )
+
+
+def decrement_comments_count(sender, instance, **kwargs):
+    adjust_counter(
+        Post.objects.filter(pk=instance.post_id), 'comments_count', -1
+    )
+
+
+def increment_replies_count(sender, instance, created, **kwargs):
+    if created and instance.parent_id:
+        adjust_counter(
+            Comment.objects.filter(pk=instance.parent_id), 'replies_count', 1
+        )
+
+
+def decrement_replies_count(sender, instance, **kwargs):
+    if instance.parent_id:
+        adjust_counter(
+            Comment.objects.filter(pk=instance.parent_id), 'replies_count', -1
+        )
+
+
+post_save.connect(increment_comments_count, sender=Comment)
+post_delete.connect(decrement_comments_count, sender=Comment)
+post_save.connect(increment_replies_count, sender=Comment)
+post_delete.connect(decrement_replies_count, sender=Comment)
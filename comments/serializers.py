@@ -1,23 +1,33 @@
 from django.contrib.humanize.templatetags.humanize import naturaltime
 from rest_framework import serializers
+from drf_api.fieldsets import SparseFieldsMixin
+from drf_api.images import ImageSrcsetField, ImageURLField
+from posts.serializers import PostSerializer
 from .models import Comment
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the Comment model
     Adds three extra fields when returning a list of Comment instances
+    The post can be rendered in full with ?expand=post
+    Replies loaded into loaded_replies, see CommentQuerySet.with_replies
+    and CommentThread, are rendered nested under replies
     """
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
-    profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+    profile_image = ImageURLField(source='owner.profile.image')
+    profile_image_srcset = ImageSrcsetField(
+        source='owner.profile.image_variants'
+    )
     created_at = serializers.SerializerMethodField()
     updated_at = serializers.SerializerMethodField()
+    replies_count = serializers.ReadOnlyField()
 
     def get_is_owner(self, obj):
         request = self.context['request']
-        return request.user == obj.owner
+        return request.user.pk == obj.owner_id
 
     def get_created_at(self, obj):
         return naturaltime(obj.created_at)
@@ -25,12 +35,40 @@ class CommentSerializer(serializers.ModelSerializer):
     def get_updated_at(self, obj):
         return naturaltime(obj.updated_at)
 
+    def validate(self, data):
+        """
+        Replies must be on the same post as their parent and within
+        the maximum thread depth
+        """
+        parent = data.get('parent')
+        if parent is not None:
+            if parent.post_id != data['post'].id:
+                raise serializers.ValidationError({
+                    'parent': 'Replies must be on the same post.'
+                })
+            if parent.depth >= Comment.MAX_DEPTH:
+                raise serializers.ValidationError({
+                    'parent': 'This thread cannot be nested any deeper.'
+                })
+        return data
+
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        replies = getattr(instance, 'loaded_replies', None)
+        if replies is not None:
+            representation['replies'] = CommentSerializer(
+                replies, many=True, context=self.context
+            ).data
+        return representation
+
     class Meta:
         model = Comment
         fields = [
             'id', 'owner', 'is_owner', 'profile_id', 'profile_image',
-            'post', 'created_at', 'updated_at', 'content'
+            'profile_image_srcset', 'post', 'parent', 'depth', 'replies_count',
+            'created_at', 'updated_at', 'content'
         ]
+        expandable_fields = {'post': PostSerializer}
 
 
 class CommentDetailSerializer(CommentSerializer):
@@ -38,4 +76,5 @@ class CommentDetailSerializer(CommentSerializer):
     Serializer for the Comment model used in Detail view
     Post is a read only field so that we dont have to set it on each update
     """
-    post = serializers.ReadOnlyField(source='post.id')
+    post = serializers.ReadOnlyField(source='post_id')
+    parent = serializers.ReadOnlyField(source='parent_id')
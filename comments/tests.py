@@ -1,3 +1,137 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+from posts.models import Post
+from .models import Comment
 
-# Create your tests here.
+
+class CommentCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.post = Post.objects.create(owner=self.user, title='a title')
+
+    def test_creating_a_comment_increments_comments_count(self):
+        Comment.objects.create(owner=self.user, post=self.post, content='hi')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_deleting_a_comment_decrements_comments_count(self):
+        comment = Comment.objects.create(
+            owner=self.user, post=self.post, content='hi'
+        )
+        comment.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 0)
+
+
+class CommentExpandTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.post = Post.objects.create(owner=self.user, title='a title')
+        for index in range(5):
+            Comment.objects.create(
+                owner=self.user, post=self.post, content=f'comment {index}'
+            )
+
+    def test_comments_load_in_a_fixed_number_of_queries(self):
+        # page count, comments with owners and profiles
+        with self.assertNumQueries(2):
+            response = self.client.get('/comments/', secure=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['post'], self.post.id)
+
+    def test_expanded_post_is_prefetched(self):
+        # page count, comments with owners and profiles, posts, tags
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                '/comments/?expand=post&fields=id,post', secure=True
+            )
+        comment = response.data['results'][0]
+        self.assertEqual(set(comment), {'id', 'post'})
+        self.assertEqual(comment['post']['title'], 'a title')
+
+    def test_expanded_post_fields_can_be_selected(self):
+        response = self.client.get(
+            '/comments/?expand=post&fields=id,post.title', secure=True
+        )
+        comment = response.data['results'][0]
+        self.assertEqual(comment['post'], {'title': 'a title'})
+
+
+class CommentThreadTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.post = Post.objects.create(owner=self.user, title='a title')
+        self.root = self.reply(None, 'root')
+
+    def reply(self, parent, content):
+        return Comment.objects.create(
+            owner=self.user, post=self.post, parent=parent, content=content
+        )
+
+    def test_paths_and_reply_counts_follow_the_tree(self):
+        child = self.reply(self.root, 'child')
+        grandchild = self.reply(child, 'grandchild')
+        self.assertEqual(grandchild.depth, 2)
+        self.assertTrue(grandchild.path.startswith(child.path))
+        self.root.refresh_from_db()
+        self.assertEqual(self.root.replies_count, 1)
+        grandchild.delete()
+        child.refresh_from_db()
+        self.assertEqual(child.replies_count, 0)
+
+    def test_editing_a_comment_keeps_replies_made_meanwhile(self):
+        stale = Comment.objects.get(pk=self.root.pk)
+        self.reply(self.root, 'child')
+        stale.content = 'edited'
+        stale.save()
+        self.root.refresh_from_db()
+        self.assertEqual(self.root.content, 'edited')
+        self.assertEqual(self.root.replies_count, 1)
+
+    def test_thread_loads_every_depth_in_two_queries(self):
+        child = self.reply(self.root, 'child')
+        self.reply(child, 'grandchild')
+        self.reply(self.root, 'second child')
+        # root, then the subtree with owners and profiles
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                f'/comments/{self.root.id}/thread/', secure=True
+            )
+        replies = response.data['replies']
+        self.assertEqual(
+            [reply['content'] for reply in replies],
+            ['child', 'second child'],
+        )
+        self.assertEqual(replies[0]['replies'][0]['content'], 'grandchild')
+
+    def test_top_level_page_nests_the_first_replies(self):
+        other_root = self.reply(None, 'other root')
+        for index in range(4):
+            self.reply(self.root, f'reply {index}')
+            self.reply(other_root, f'other reply {index}')
+        # post filter lookup, page count, top level comments,
+        # first replies of all of them
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                f'/comments/?post={self.post.id}'
+                '&parent__isnull=true&replies=2',
+                secure=True,
+            )
+        results = response.data['results']
+        self.assertEqual(len(results), 2)
+        root = results[-1]
+        self.assertEqual(root['replies_count'], 4)
+        self.assertEqual(
+            [reply['content'] for reply in root['replies']],
+            ['reply 0', 'reply 1'],
+        )
+
+    def test_replies_must_be_on_the_same_post(self):
+        other_post = Post.objects.create(owner=self.user, title='other')
+        self.client.force_authenticate(self.user)
+        response = self.client.post('/comments/', {
+            'post': other_post.id, 'parent': self.root.id, 'content': 'hi',
+        }, secure=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -3,5 +3,6 @@ from comments import views
 
 urlpatterns = [
     path('comments/', views.CommentList.as_view()),
-    path('comments/<int:pk>/', views.CommentDetail.as_view())
+    path('comments/<int:pk>/', views.CommentDetail.as_view()),
+    path('comments/<int:pk>/thread/', views.CommentThread.as_view()),
 ]
@@ -1,31 +1,144 @@
+from django.contrib.humanize.templatetags.humanize import naturaltime
 from django.shortcuts import render
 from rest_framework import generics, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_api.cache import AnonymousResponseCacheMixin
+from drf_api.conditional import (
+    ConditionalRetrieveMixin, LastModifiedListMixin
+)
+from drf_api.fieldsets import expanded_fields, selected_fields
 from drf_api.permissions import IsOwnerOrReadOnly
+from drf_api.pagination import FeedPagination
 from .models import Comment
+from posts.serializers import PostSerializer
 from .serializers import CommentSerializer, CommentDetailSerializer
 
-# Create your views here.
+# Models rendered by CommentSerializer, including an expanded post,
+# see drf_api.cache
+COMMENT_CACHE_MODELS = (
+    'comments.Comment', 'profiles.Profile', 'auth.User',
+    'posts.Post', 'likes.Like',
+)
 
 
-class CommentList(generics.ListCreateAPIView):
+class CommentQueryMixin:
+    """
+    Builds the comments queryset for the fields the request renders
+    """
+
+    def get_queryset(self):
+        request = self.request
+        serializer_class = self.get_serializer_class()
+        post_fields = None
+        if 'post' in expanded_fields(request, serializer_class):
+            post_fields = selected_fields(request, PostSerializer, 'post')
+        return Comment.objects.for_display(
+            request.user,
+            selected_fields(request, serializer_class),
+            post_fields,
+        )
+
+
+class CommentList(
+    AnonymousResponseCacheMixin, LastModifiedListMixin, CommentQueryMixin,
+    generics.ListCreateAPIView
+):
     """
     List comments or create a comment if logged in.
+    ?parent__isnull=true lists top level comments only and ?replies=N
+    nests the first N replies of each comment, in one extra query.
     """
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = Comment.objects.all()
+    pagination_class = FeedPagination
+    cache_models = COMMENT_CACHE_MODELS
     filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['post']
+    filterset_fields = {
+        'post': ['exact'],
+        'parent': ['exact', 'isnull'],
+    }
+    max_replies = 20
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        replies = self.request.query_params.get('replies')
+        if not replies:
+            return queryset
+        try:
+            limit = min(int(replies), self.max_replies)
+        except ValueError:
+            raise ValidationError({'replies': 'A valid integer is required.'})
+        return queryset.with_replies(
+            self.request.user,
+            limit,
+            selected_fields(self.request, self.get_serializer_class()),
+        )
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
 
-class CommentDetail(generics.RetrieveUpdateDestroyAPIView):
+class CommentThread(CommentQueryMixin, generics.RetrieveAPIView):
+    """
+    Retrieve a comment with all of its replies nested at every depth,
+    loading the whole subtree in one query
+    """
+    serializer_class = CommentSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        root = self.get_object()
+        comments = {root.pk: root}
+        root.loaded_replies = []
+        descendants = root.descendants().for_display(
+            request.user, selected_fields(request, self.serializer_class)
+        )
+        for comment in descendants:
+            comment.loaded_replies = []
+            comments[comment.parent_id].loaded_replies.append(comment)
+            comments[comment.pk] = comment
+        return Response(self.get_serializer(root).data)
+
+
+class CommentDetail(
+    AnonymousResponseCacheMixin, ConditionalRetrieveMixin, CommentQueryMixin,
+    generics.RetrieveUpdateDestroyAPIView
+):
     """
     Retrieve a comment, or update or delete it by id if you own it.
     """
     permission_classes = [IsOwnerOrReadOnly]
+    cache_models = COMMENT_CACHE_MODELS
     serializer_class = CommentDetailSerializer
-    queryset = Comment.objects.all()
+    etag_fields = (
+        'created_at', 'updated_at', 'content',
+        'owner__username', 'owner__profile__updated_at',
+        'post__updated_at', 'post__likes_count', 'post__comments_count',
+        'replies_count',
+    )
+    etag_field_sources = {
+        'owner__username': ('owner',),
+        'owner__profile__updated_at': (
+            'profile_image', 'profile_image_srcset',
+        ),
+    }
+
+    def get_etag_fields(self):
+        """
+        The post only changes the rendered comment when it is expanded
+        """
+        fields = super().get_etag_fields()
+        if 'post' in expanded_fields(self.request, self.serializer_class):
+            return fields
+        return [
+            field for field in fields if not field.startswith('post__')
+        ]
+
+    def get_etag_values(self, values):
+        """
+        Timestamps are rendered relative to now, so the ETag follows the
+        rendered text rather than the stored value
+        """
+        created_at, updated_at, *rest = values
+        return [naturaltime(created_at), naturaltime(updated_at), *rest]
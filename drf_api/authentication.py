@@ -0,0 +1,41 @@
+"""
+JWT authentication without a database query per request.
+
+The authenticated user is cached along with their profile, under a key
+holding the user id and a version of the user. Saving or deleting the
+user, saving their profile, storing a new profile image and logging out
+bump the version, see profiles.models, so stale users are never read
+again and simply expire.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ObjectDoesNotExist
+from dj_rest_auth.jwt_auth import JWTCookieAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from drf_api.cache import cached_user_key
+
+
+class CachedJWTCookieAuthentication(JWTCookieAuthentication):
+    """
+    JWTCookieAuthentication reading the user and their profile from the
+    cache, only querying the database when they are not cached
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+        cache = caches[settings.AUTH_USER_CACHE_ALIAS]
+        key = cached_user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            # Inactive and unknown users are rejected here, and are
+            # never cached
+            user = super().get_user(validated_token)
+            try:
+                user.profile
+            except ObjectDoesNotExist:
+                pass
+            cache.set(key, user, settings.AUTH_USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,195 @@
+"""
+Response caching for anonymous reads of the public list and detail views.
+
+Rendered JSON is stored per path, normalized query string, media type and
+the current version of every model the view depends on. Saving or deleting
+any of those models bumps its version, so stale entries are never read
+again and simply expire.
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_save, post_delete
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from rest_framework.response import Response
+
+CACHE_PREFIX = 'response-cache'
+USER_CACHE_PREFIX = 'auth-user'
+CACHED_HEADERS = ('Vary', 'Allow', 'ETag', 'Last-Modified')
+VERSIONED_MODELS = (
+    'auth.User',
+    'posts.Post',
+    'comments.Comment',
+    'likes.Like',
+    'followers.Follower',
+    'profiles.Profile',
+)
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def version_key(label):
+    return f'{CACHE_PREFIX}:version:{label.lower()}'
+
+
+def bump_cache_version(model):
+    """
+    Invalidates every cached response depending on model
+    """
+    cache = get_cache()
+    key = version_key(model._meta.label)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def record_cache_event(event):
+    cache = get_cache()
+    key = f'{CACHE_PREFIX}:stats:{event}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def cache_stats():
+    """
+    Returns the response cache hit and miss counters
+    """
+    cache = get_cache()
+    keys = {
+        event: f'{CACHE_PREFIX}:stats:{event}'
+        for event in ('hits', 'misses')
+    }
+    values = cache.get_many(keys.values())
+    return {event: values.get(key, 0) for event, key in keys.items()}
+
+
+def user_version_key(user_id):
+    return f'{USER_CACHE_PREFIX}:version:{user_id}'
+
+
+def cached_user_key(user_id):
+    """
+    Cache key of the user authenticated by drf_api.authentication, for
+    the current version of the user
+    """
+    cache = caches[settings.AUTH_USER_CACHE_ALIAS]
+    version = cache.get(user_version_key(user_id), 0)
+    return f'{USER_CACHE_PREFIX}:user:{user_id}:{version}'
+
+
+def invalidate_cached_user(user_id):
+    """
+    Makes the next request of the user load them from the database
+    """
+    cache = caches[settings.AUTH_USER_CACHE_ALIAS]
+    key = user_version_key(user_id)
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def response_cache_key(request, models):
+    """
+    Builds the cache key for an anonymous request from its path, sorted
+    query parameters, accepted media type and the versions of models
+    """
+    version_keys = [version_key(label) for label in models]
+    versions = get_cache().get_many(version_keys)
+    query = sorted(
+        (name, value)
+        for name in request.query_params
+        for value in request.query_params.getlist(name)
+    )
+    parts = [
+        request.path,
+        repr(query),
+        request.accepted_media_type or '',
+        *(f'{key}={versions.get(key, 0)}' for key in version_keys),
+    ]
+    digest = hashlib.sha256('|'.join(parts).encode()).hexdigest()
+    return f'{CACHE_PREFIX}:response:{digest}'
+
+
+def invalidate_on_write(sender, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login'}:
+        # Logging in does not change anything the API renders
+        return
+    bump_cache_version(sender)
+
+
+for label in VERSIONED_MODELS:
+    post_save.connect(
+        invalidate_on_write, sender=label,
+        dispatch_uid=f'response-cache-save-{label}'
+    )
+    post_delete.connect(
+        invalidate_on_write, sender=label,
+        dispatch_uid=f'response-cache-delete-{label}'
+    )
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Serves GET requests from logged out users out of the response cache.
+    cache_models lists the 'app_label.Model' labels whose writes must
+    invalidate the view's responses.
+    """
+    cache_models = ()
+
+    def get(self, request, *args, **kwargs):
+        self.response_cache_key = None
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        self.response_cache_key = response_cache_key(
+            request, self.cache_models
+        )
+        cached = get_cache().get(self.response_cache_key)
+        if cached is None:
+            record_cache_event('misses')
+            return super().get(request, *args, **kwargs)
+
+        record_cache_event('hits')
+        self.response_cache_key = None
+        response = HttpResponse(
+            cached['content'], content_type=cached['content_type']
+        )
+        for header, value in cached['headers'].items():
+            response[header] = value
+        response = get_conditional_response(
+            request, etag=cached['headers'].get('ETag'), response=response
+        )
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        key = getattr(self, 'response_cache_key', None)
+        if (
+            key and isinstance(response, Response)
+            and response.status_code == 200
+        ):
+            response.render()
+            get_cache().set(key, {
+                'content': response.content,
+                'content_type': response['Content-Type'],
+                'headers': {
+                    header: response[header]
+                    for header in CACHED_HEADERS if response.has_header(header)
+                },
+            }, settings.RESPONSE_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,132 @@
+"""
+Conditional GET support: strong ETags on detail views and Last-Modified
+on list views
+"""
+import hashlib
+from django.utils.cache import (
+    get_conditional_response, patch_vary_headers, quote_etag
+)
+from django.utils.http import http_date
+from .fieldsets import selected_fields
+
+
+class ConditionalRetrieveMixin:
+    """
+    Adds a strong ETag to detail responses and answers a matching
+    If-None-Match with 304 before the object is loaded or serialized.
+    The ETag hashes etag_fields, which must cover everything the
+    serializer renders that can change, plus the requesting user since
+    some fields are viewer specific. Conditional requests look the fields
+    up with a single row query, others read them from the loaded object.
+    etag_field_sources maps etag fields to the serializer fields
+    rendering them, so they are skipped when ?fields= or ?omit= leave
+    those out, see drf_api.fieldsets. Viewer specific annotations, such
+    as the viewer's like_id, are looked up on get_etag_queryset().
+    """
+    etag_fields = ('updated_at',)
+    etag_field_sources = {}
+
+    def get_etag_fields(self):
+        rendered = selected_fields(self.request, self.get_serializer_class())
+        return [
+            field for field in self.etag_fields
+            if field not in self.etag_field_sources
+            or not rendered.isdisjoint(self.etag_field_sources[field])
+        ]
+
+    def get_etag_queryset(self):
+        """
+        Hook for annotating the values etag_fields refer to
+        """
+        model = self.get_serializer_class().Meta.model
+        return model._default_manager.all()
+
+    def get_etag_values(self, values):
+        """
+        Hook for turning the looked up values into what is rendered
+        """
+        return values
+
+    def build_etag(self, request, values):
+        model = self.get_serializer_class().Meta.model
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        parts = [
+            model._meta.label,
+            str(self.kwargs[lookup_url_kwarg]),
+            request.user.pk,
+            request.accepted_media_type,
+            *self.get_etag_values(values),
+        ]
+        digest = hashlib.sha256(repr(parts).encode()).hexdigest()
+        return quote_etag(digest)
+
+    def lookup_etag(self, request):
+        """
+        ETag from a single row lookup, without loading the object
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        values = self.get_etag_queryset().filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).values_list(*self.get_etag_fields()).first()
+        if values is None:
+            return None
+        return self.build_etag(request, values)
+
+    def object_etag(self, request, obj):
+        """
+        ETag from an already loaded object and its related objects
+        """
+        values = []
+        for field in self.get_etag_fields():
+            value = obj
+            for attribute in field.split('__'):
+                value = getattr(value, attribute)
+            values.append(value)
+        return self.build_etag(request, values)
+
+    def get_object(self):
+        self.object = super().get_object()
+        return self.object
+
+    def with_etag(self, response, etag):
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Cookie', 'Authorization'))
+        return response
+
+    def get(self, request, *args, **kwargs):
+        etag = None
+        if (
+            'HTTP_IF_NONE_MATCH' in request.META
+            or 'HTTP_IF_MATCH' in request.META
+        ):
+            etag = self.lookup_etag(request)
+            if etag is not None:
+                response = get_conditional_response(request, etag=etag)
+                if response is not None:
+                    return self.with_etag(response, etag)
+
+        self.object = None
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200 and self.object is not None:
+            etag = etag or self.object_etag(request, self.object)
+            self.with_etag(response, etag)
+        return response
+
+
+class LastModifiedListMixin:
+    """
+    Sets Last-Modified on list responses from the newest updated_at of
+    the rows on the page, without an extra query.
+    """
+
+    def paginate_queryset(self, queryset):
+        self.page_objects = super().paginate_queryset(queryset)
+        return self.page_objects
+
+    def list(self, request, *args, **kwargs):
+        self.page_objects = None
+        response = super().list(request, *args, **kwargs)
+        if self.page_objects:
+            newest = max(obj.updated_at for obj in self.page_objects)
+            response['Last-Modified'] = http_date(newest.timestamp())
+        return response
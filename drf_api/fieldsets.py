@@ -0,0 +1,85 @@
+"""
+Sparse fieldsets for read requests.
+
+?fields=id,title renders only the listed fields, ?omit=tags renders
+everything but the listed fields and ?expand=post replaces a field
+named in the serializer's Meta.expandable_fields with its nested
+representation. Dotted names apply to nested serializers, e.g.
+/bookmarks/?fields=id,post.title.
+
+Views pass selected_fields() to their queryset builders so joins,
+prefetches and annotations are only added for fields being rendered.
+"""
+from rest_framework.permissions import SAFE_METHODS
+
+
+def query_names(request, param, prefix=''):
+    """
+    Names listed in the comma separated query parameter param,
+    relative to the nested serializer at prefix ('' for the top level)
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return set()
+    names = set()
+    for name in request.query_params.get(param, '').split(','):
+        name = name.strip()
+        if prefix:
+            if not name.startswith(prefix + '.'):
+                continue
+            name = name[len(prefix) + 1:]
+        if name:
+            names.add(name)
+    return names
+
+
+def selected_fields(request, serializer_class, prefix=''):
+    """
+    Names of the fields serializer_class renders for request
+    """
+    fields = set(serializer_class.Meta.fields)
+    only = {
+        name.split('.', 1)[0]
+        for name in query_names(request, 'fields', prefix)
+    }
+    if only:
+        fields &= only
+    return fields - query_names(request, 'omit', prefix)
+
+
+def expanded_fields(request, serializer_class, prefix=''):
+    """
+    Names of the selected fields rendered with their nested serializer
+    """
+    expandable = getattr(serializer_class.Meta, 'expandable_fields', {})
+    return (
+        query_names(request, 'expand', prefix)
+        & set(expandable)
+        & selected_fields(request, serializer_class, prefix)
+    )
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin applying ?fields=, ?omit= and ?expand=.
+    Serializers nested inside another one take a field_prefix naming
+    the field they are rendered under.
+    """
+
+    def __init__(self, *args, field_prefix='', **kwargs):
+        self.field_prefix = field_prefix
+        super().__init__(*args, **kwargs)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        selected = selected_fields(request, type(self), self.field_prefix)
+        for name in list(fields):
+            if name not in selected:
+                del fields[name]
+        for name in expanded_fields(request, type(self), self.field_prefix):
+            serializer_class = self.Meta.expandable_fields[name]
+            fields[name] = serializer_class(
+                read_only=True,
+                field_prefix='.'.join(filter(None, [self.field_prefix, name])),
+            )
+        return fields
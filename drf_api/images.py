@@ -0,0 +1,394 @@
+"""
+Asynchronous image uploads for posts and profiles.
+
+Uploaded images are written to the local staging storage and the model
+is flagged as pending, so the request returns without waiting on the
+image storage. Once the transaction commits, a background task scales
+the image down, saves it to the image storage along with smaller
+renditions and webp copies, and flips the model to ready, keeping the
+previous image visible meanwhile.
+
+Models taking part have an image field, an image_status, a
+staged_image holding the name of the upload being processed and
+image_variants describing the stored renditions, rendered by
+ImageSrcsetField.
+"""
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.files.uploadedfile import UploadedFile
+from django.core.signals import setting_changed
+from django.db import connections, models, transaction
+from django.db.models.signals import ModelSignal
+from django.utils import timezone
+from django.utils.functional import LazyObject, empty
+from django.utils.module_loading import import_string
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from drf_api.cache import bump_cache_version
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+READY = 'ready'
+FAILED = 'failed'
+IMAGE_STATUS_CHOICES = [
+    (PENDING, 'Pending'),
+    (READY, 'Ready'),
+    (FAILED, 'Failed'),
+]
+
+# Columns only written by the pipeline, with queryset updates
+PIPELINE_FIELDS = ('image_status', 'staged_image', 'image_variants')
+
+# Sent with the model and pk once a processed image is stored, as the
+# model is updated without being saved
+image_stored = ModelSignal(use_caching=True)
+
+# Every rendition is also stored in this format, smaller than JPEG and
+# PNG for the same quality
+MODERN_FORMAT = 'WEBP'
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 80},
+}
+
+
+class ImageStorage(LazyObject):
+    """
+    The storage configured as STORAGES['images'], resolved on first use
+    """
+
+    def _setup(self):
+        self._wrapped = storages['images']
+
+
+image_storage_backend = ImageStorage()
+
+
+def image_storage():
+    """
+    Storage of the image fields, a callable so that migrations do not
+    depend on the configured backend
+    """
+    return image_storage_backend
+
+
+@lru_cache(maxsize=settings.IMAGE_URL_CACHE_SIZE)
+def resolve_image_url(name):
+    return image_storage_backend.url(name)
+
+
+def image_url(name, request=None):
+    """
+    URL of the stored image name. URLs of the images storage only depend
+    on the name, so they are memoized for the request, then in a bounded
+    process-wide LRU of IMAGE_URL_CACHE_SIZE names.
+    """
+    if request is None:
+        return resolve_image_url(name)
+    try:
+        urls = request._image_urls
+    except AttributeError:
+        urls = request._image_urls = {}
+    try:
+        return urls[name]
+    except KeyError:
+        url = urls[name] = resolve_image_url(name)
+        return url
+
+
+def reset_image_storage(*, setting, **kwargs):
+    if setting == 'STORAGES':
+        image_storage_backend._wrapped = empty
+        resolve_image_url.cache_clear()
+
+
+setting_changed.connect(reset_image_storage)
+
+
+class InProcessBackend:
+    """
+    Runs tasks in the calling thread, for tests and scripts
+    """
+
+    def submit(self, func, *args):
+        func(*args)
+
+
+class ThreadPoolBackend:
+    """
+    Runs tasks in a pool of IMAGE_PIPELINE_WORKERS threads of the web
+    process. Tasks still queued when the process exits are lost and
+    their models stay pending until the image is uploaded again.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_PIPELINE_WORKERS,
+            thread_name_prefix='image-pipeline',
+        )
+
+    def submit(self, func, *args):
+        self.executor.submit(self.run, func, *args)
+
+    @staticmethod
+    def run(func, *args):
+        try:
+            func(*args)
+        except Exception:
+            logger.exception('Image pipeline task failed')
+        finally:
+            # Connections opened by this worker thread
+            connections.close_all()
+
+
+backends = {}
+
+
+def get_backend():
+    path = settings.IMAGE_PIPELINE_BACKEND
+    if path not in backends:
+        backends[path] = import_string(path)()
+    return backends[path]
+
+
+def submit_image(instance, upload):
+    """
+    Stages upload as the new image of instance and queues it for
+    processing once the current transaction commits
+    """
+    model = type(instance)
+    staged_name = storages['staging'].save(
+        f'{instance._meta.label_lower}/{os.path.basename(upload.name)}',
+        upload,
+    )
+    model.objects.filter(pk=instance.pk).update(
+        image_status=PENDING, staged_image=staged_name
+    )
+    instance.image_status = PENDING
+    instance.staged_image = staged_name
+    transaction.on_commit(partial(
+        get_backend().submit,
+        process_image, instance._meta.label, instance.pk, staged_name,
+    ))
+
+
+def encode_image(image, image_format):
+    """
+    Returns the content of image encoded in image_format
+    """
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    output = BytesIO()
+    image.save(
+        output, format=image_format, **SAVE_OPTIONS.get(image_format, {})
+    )
+    return ContentFile(output.getvalue())
+
+
+def save_renditions(storage, name, file, saved):
+    """
+    Saves the image in file under name, upright and at most
+    IMAGE_MAX_DIMENSION pixels on its longest side, along with its
+    smaller IMAGE_SIZES renditions and a MODERN_FORMAT copy of each.
+    Returns the stored name of the image and the variants describing
+    every file, appending stored names to saved as it goes.
+    """
+    root = os.path.splitext(name)[0]
+    sizes = sorted(
+        settings.IMAGE_SIZES.items(), key=lambda item: item[1], reverse=True
+    )
+    variants = []
+    with Image.open(file) as image:
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        # Largest first, each rendition scaled down from the previous one
+        for size, limit in [('full', settings.IMAGE_MAX_DIMENSION), *sizes]:
+            if variants and max(image.size) <= limit:
+                # Renditions are never scaled up
+                continue
+            image = image.copy()
+            image.thumbnail((limit, limit))
+            for variant_format in dict.fromkeys([image_format, MODERN_FORMAT]):
+                if variants:
+                    variant_name = f'{root}_{size}.{variant_format.lower()}'
+                else:
+                    variant_name = name
+                variant_name = storage.save(
+                    variant_name, encode_image(image, variant_format)
+                )
+                saved.append(variant_name)
+                variants.append({
+                    'size': size,
+                    'type': Image.MIME[variant_format],
+                    'width': image.width,
+                    'name': variant_name,
+                })
+    return variants[0]['name'], variants
+
+
+def process_image(model_label, pk, staged_name):
+    """
+    Stores the staged image of the model instance with its renditions
+    and marks it ready, or failed if the image cannot be processed.
+    Uploads superseded by a newer one, or whose instance was deleted
+    meanwhile, are discarded.
+    """
+    model = apps.get_model(model_label)
+    field = model._meta.get_field('image')
+    staging = storages['staging']
+    pending = model.objects.filter(pk=pk, staged_image=staged_name)
+    saved = []
+    try:
+        with staging.open(staged_name) as staged:
+            name, variants = save_renditions(
+                field.storage,
+                field.generate_filename(
+                    model(pk=pk), os.path.basename(staged_name)
+                ),
+                staged,
+                saved,
+            )
+    except Exception:
+        logger.exception('Could not process %s', staged_name)
+        pending.update(
+            image_status=FAILED, staged_image='', updated_at=timezone.now()
+        )
+        discarded = saved
+    else:
+        updated = pending.update(
+            image=name, image_variants=variants, image_status=READY,
+            staged_image='', updated_at=timezone.now(),
+        )
+        discarded = [] if updated else saved
+        if updated:
+            image_stored.send(sender=model, pk=pk)
+    for name in discarded:
+        field.storage.delete(name)
+    staging.delete(staged_name)
+    bump_cache_version(model)
+
+
+class ImageURLMixin:
+    """
+    Field mixin resolving image URLs through image_url
+    """
+
+    def image_url(self, name):
+        return image_url(name, self.context.get('request'))
+
+
+class ImageURLField(ImageURLMixin, serializers.Field):
+    """
+    Renders the URL of an image field, e.g. source='owner.profile.image'
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return self.image_url(value.name) if value else None
+
+
+class ImageField(ImageURLMixin, serializers.ImageField):
+    """
+    ImageField rendering the URL through image_url
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = self.image_url(value.name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+
+class ImageSrcsetField(ImageURLMixin, serializers.Field):
+    """
+    Renders image_variants as one srcset per media type, e.g.
+    {"image/webp": "<url> 128w, <url> 720w, <url> 2048w"}, or null for
+    images stored before renditions were generated
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        srcset = {}
+        for variant in sorted(variants, key=lambda variant: variant['width']):
+            srcset.setdefault(variant['type'], []).append(
+                f"{self.image_url(variant['name'])} {variant['width']}w"
+            )
+        return {
+            media_type: ', '.join(candidates)
+            for media_type, candidates in srcset.items()
+        }
+
+
+class PipelineImageModelMixin:
+    """
+    Model mixin keeping the columns written by the pipeline out of full
+    saves of existing rows. The image is only saved when it was changed
+    since the instance was loaded, so a stale instance never reverts an
+    image stored by process_image meanwhile.
+    """
+
+    def stored_image_name(self):
+        # Read from __dict__, as accessing a deferred image loads it
+        image = self.__dict__.get('image')
+        return getattr(image, 'name', image) or ''
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_image = instance.stored_image_name()
+        return instance
+
+    def pipeline_fields(self):
+        """
+        Returns the pipeline columns to leave out of a full save
+        """
+        if getattr(self, '_loaded_image', None) == self.stored_image_name():
+            return (*PIPELINE_FIELDS, 'image')
+        return PIPELINE_FIELDS
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_image = self.stored_image_name()
+
+
+class DeferredImageMixin:
+    """
+    Serializer mixin handing uploaded images to the image pipeline
+    instead of saving them to the image storage within the request.
+    Image fields render their URL through image_url.
+    """
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: ImageField,
+    }
+
+    def save(self, **kwargs):
+        upload = self.validated_data.get('image')
+        if isinstance(upload, UploadedFile):
+            del self.validated_data['image']
+        else:
+            upload = None
+        instance = super().save(**kwargs)
+        if upload is not None:
+            submit_image(instance, upload)
+        return instance
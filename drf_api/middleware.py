@@ -1,6 +1,15 @@
+import logging
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.middleware.csrf import rotate_token
 from django.contrib.auth import logout
 
+logger = logging.getLogger('drf_api.queries')
+
 
 class TokenValidationMiddleware:
     def __init__(self, get_response):
@@ -9,3 +18,96 @@ class TokenValidationMiddleware:
     def __call__(self, request):
         response = self.get_response(request)
         return response
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper recording each statement, its parameters
+    and how long it took
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                (sql, repr(params), time.perf_counter() - start)
+            )
+
+    def profile(self, threshold):
+        """
+        Summary of the recorded queries. Statements run more than
+        threshold times with differing parameters are reported as N+1
+        patterns, statements repeated with the same parameters as
+        duplicates.
+        """
+        executions = Counter()
+        parameters = defaultdict(set)
+        for sql, params, _ in self.queries:
+            executions[(sql, params)] += 1
+            parameters[sql].add(params)
+        return {
+            'queries': len(self.queries),
+            'db_ms': round(
+                sum(duration for *_, duration in self.queries) * 1000, 2
+            ),
+            'duplicates': sum(
+                count - 1 for count in executions.values() if count > 1
+            ),
+            'n_plus_one': [
+                {'sql': sql, 'count': len(params)}
+                for sql, params in parameters.items()
+                if len(params) > threshold
+            ],
+        }
+
+
+class QueryProfilerMiddleware:
+    """
+    Opt-in instrumentation, enabled with QUERY_PROFILER, counting the
+    queries, database time and repeated statements of each request.
+    Reports them in a Server-Timing header and logs them to the
+    drf_api.queries logger, as a warning when an N+1 pattern is found.
+    Queries run while a streaming response is consumed are not seen.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_PROFILER:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = settings.QUERY_PROFILER_N_PLUS_ONE_THRESHOLD
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        profile = recorder.profile(self.threshold)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={profile["db_ms"]};desc="{profile["queries"]} queries"',
+            f'dup;desc="{profile["duplicates"]} duplicates"',
+            f'total;dur={total_ms}',
+        ])
+
+        log = logger.warning if profile['n_plus_one'] else logger.info
+        log(
+            '%s %s: %d queries in %sms, %d N+1 pattern(s)',
+            request.method, request.path, profile['queries'],
+            profile['db_ms'], len(profile['n_plus_one']),
+            extra={'query_profile': {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'total_ms': total_ms,
+                **profile,
+            }},
+        )
+        return response
@@ -0,0 +1,44 @@
+"""
+Pagination classes shared by the feed style list views
+"""
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id), newest first.
+    Pages are fetched with an indexed range instead of OFFSET and
+    no COUNT(*) is issued.
+    """
+    ordering = ('-created_at', '-id')
+
+
+class FeedPagination(PageNumberPagination):
+    """
+    Page number pagination by default, switching to cursor pagination
+    per request when the client asks for ?pagination=cursor or follows
+    a cursor link (?cursor=...)
+    """
+    cursor_pagination_class = CreatedAtCursorPagination
+    pagination_query_param = 'pagination'
+
+    def use_cursor(self, request):
+        return (
+            request.query_params.get(self.pagination_query_param) == 'cursor'
+            or self.cursor_pagination_class.cursor_query_param
+            in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,74 @@
+"""
+JSON renderers backed by orjson when it is installed, falling back to
+the stdlib json module used by rest_framework otherwise
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Encodes what orjson does not handle natively, or is told to pass
+# through (datetimes), the way rest_framework's encoder does
+orjson_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Compact JSON rendered by orjson, in the format of JSONRenderer,
+    although floats may be written differently (1e16 for 1e+16) and
+    NaN and infinities, which JSONRenderer rejects, are rendered as
+    null. Indented responses, and data orjson cannot encode such as
+    integers over 64 bits, go through JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=orjson_default,
+                option=(
+                    orjson.OPT_PASSTHROUGH_DATETIME
+                    | orjson.OPT_NON_STR_KEYS
+                ),
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Escaped by JSONRenderer too, as they are invalid in javascript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028')
+            ret = ret.replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class StreamingJSONRenderer(FastJSONRenderer):
+    """
+    Renders a list as {"results": [...]} one item at a time, for use
+    with StreamingHttpResponse, so that large exports never hold the
+    whole document in memory
+    """
+    buffer_size = 64 * 1024
+
+    def render_stream(self, items, renderer_context=None):
+        buffer = [b'{"results":[']
+        size = 0
+        for index, item in enumerate(items):
+            chunk = self.render(item, renderer_context=renderer_context)
+            if index:
+                buffer.append(b',')
+            buffer.append(chunk)
+            size += len(chunk) + 1
+            if size >= self.buffer_size:
+                yield b''.join(buffer)
+                buffer = []
+                size = 0
+        buffer.append(b']}')
+        yield b''.join(buffer)
@@ -1,12 +1,43 @@
 from dj_rest_auth.serializers import UserDetailsSerializer
 from rest_framework import serializers
+from .images import ImageSrcsetField, ImageURLField
 
 
 class CurrentUserSerializer(UserDetailsSerializer):
     profile_id = serializers.ReadOnlyField(source='profile.id')
-    profile_image = serializers.ReadOnlyField(source='profile.image.url')
+    profile_image = ImageURLField(source='profile.image')
+    profile_image_srcset = ImageSrcsetField(source='profile.image_variants')
 
     class Meta(UserDetailsSerializer.Meta):
         fields = UserDetailsSerializer.Meta.fields + (
-            'profile_id', 'profile_image'
+            'profile_id', 'profile_image', 'profile_image_srcset'
         )
+
+
+class IdListField(serializers.ListField):
+    """
+    List of ids passed as one comma separated query parameter
+    """
+    child = serializers.IntegerField(min_value=1)
+
+    def get_value(self, dictionary):
+        if self.field_name not in dictionary:
+            return serializers.empty
+        return [
+            item for item in dictionary[self.field_name].split(',') if item
+        ]
+
+
+class ViewerStateQuerySerializer(serializers.Serializer):
+    """
+    Validates the post and profile ids passed to /me/state/
+    """
+    posts = IdListField(required=False, max_length=100)
+    profiles = IdListField(required=False, max_length=100)
+
+    def validate(self, data):
+        if not data.get('posts') and not data.get('profiles'):
+            raise serializers.ValidationError(
+                'Pass at least one post or profile id.'
+            )
+        return data
@@ -11,9 +11,11 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
 from pathlib import Path
+import importlib.util
 import os
 import re
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
@@ -29,6 +31,36 @@ CLOUDINARY_STORAGE = {
 
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
+# Image uploads, see drf_api.images. Uploads are staged on the local
+# filesystem and saved to the images storage by background workers
+IMAGE_STAGING_ROOT = os.environ.get(
+    'IMAGE_STAGING_ROOT', str(BASE_DIR / 'staging')
+)
+IMAGE_PIPELINE_BACKEND = 'drf_api.images.ThreadPoolBackend'
+IMAGE_PIPELINE_WORKERS = int(os.environ.get('IMAGE_PIPELINE_WORKERS', 2))
+# Longest side of stored images in pixels, larger uploads are scaled down
+IMAGE_MAX_DIMENSION = int(os.environ.get('IMAGE_MAX_DIMENSION', 2048))
+# Smaller renditions stored alongside, longest side in pixels
+IMAGE_SIZES = {'avatar': 128, 'feed': 720}
+# Number of image URLs memoized per process, see drf_api.images.image_url
+IMAGE_URL_CACHE_SIZE = int(os.environ.get('IMAGE_URL_CACHE_SIZE', 4096))
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'images': {
+        'BACKEND': 'cloudinary_storage.storage.MediaCloudinaryStorage',
+    },
+    'staging': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {'location': IMAGE_STAGING_ROOT},
+    },
+}
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -45,7 +77,7 @@ SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 # Rest Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'dj_rest_auth.jwt_auth.JWTCookieAuthentication',
+        'drf_api.authentication.CachedJWTCookieAuthentication',
         'rest_framework.authentication.SessionAuthentication'
     ],
     'DEFAULT_PAGINATION_CLASS': (
@@ -55,11 +87,20 @@ REST_FRAMEWORK = {
     'DATETIME_FORMAT': '%d %b %Y',
 }
 
-# Only use JSONRenderer in production
-if 'DEV' not in os.environ:
-    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
-        'rest_framework.renderers.JSONRenderer',
-    ]
+# JSON is rendered and parsed with orjson when installed, see
+# drf_api.renderers. Only use JSON in production
+REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] = [
+    'drf_api.parsers.FastJSONParser',
+    'rest_framework.parsers.FormParser',
+    'rest_framework.parsers.MultiPartParser',
+]
+REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+    'drf_api.renderers.FastJSONRenderer',
+]
+if 'DEV' in os.environ:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append(
+        'rest_framework.renderers.BrowsableAPIRenderer'
+    )
 
 # Enhanced JWT Settings
 REST_USE_JWT = True
@@ -76,8 +117,38 @@ JWT_AUTH_REFRESH_COOKIE_HTTPONLY = True
 JWT_AUTH_COOKIE_PATH = '/'
 JWT_AUTH_REFRESH_COOKIE_PATH = '/'
 
+# Cache configuration
+# Local memory by default, a shared Redis cache when REDIS_URL is set
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+if 'REDIS_URL' in os.environ:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL'),
+    }
+
+# Anonymous response cache, see drf_api.cache
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get('RESPONSE_CACHE_TIMEOUT', 60))
+
+# Users authenticated by JWT are cached for this many seconds, see
+# drf_api.authentication. Without REDIS_URL the cache is per process, so
+# changes made in other processes show after at most this long
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get('AUTH_USER_CACHE_TIMEOUT', 300))
+
+# Home feed configuration
+FEED_MAX_LENGTH = int(os.environ.get('FEED_MAX_LENGTH', 500))
+
+# Number of days of tag usage counted in Tag.trending_score
+TAG_TRENDING_WINDOW_DAYS = int(os.environ.get('TAG_TRENDING_WINDOW_DAYS', 7))
+
 # Session configuration
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# Sessions are read from the cache, written through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
 REST_AUTH_SERIALIZERS = {
@@ -132,6 +203,8 @@ INSTALLED_APPS = [
     'likes',
     'bookmarks',
     'followers',
+    'feed',
+    'benchmarks',
     'rest_framework',
 ]
 SITE_ID = 1
@@ -146,6 +219,7 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 MIDDLEWARE = [
+    'drf_api.middleware.QueryProfilerMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -157,6 +231,14 @@ MIDDLEWARE = [
     'drf_api.middleware.TokenValidationMiddleware',
 ]
 
+# Per request query counts, database time and N+1 detection, reported
+# in a Server-Timing header and the drf_api.queries logger. Statements
+# repeated with differing parameters more than the threshold are N+1s
+QUERY_PROFILER = 'QUERY_PROFILER' in os.environ
+QUERY_PROFILER_N_PLUS_ONE_THRESHOLD = int(
+    os.environ.get('QUERY_PROFILER_N_PLUS_ONE_THRESHOLD', 5)
+)
+
 # Enhanced CORS settings
 CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOWED_ORIGINS = [
@@ -223,9 +305,43 @@ WSGI_APPLICATION = 'drf_api.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# Connections are kept open for DATABASE_CONN_MAX_AGE seconds, 0 to close
+# them after every request, and checked before being reused
 DATABASES = {
-    'default': dj_database_url.parse(os.environ.get('DATABASE_URL'))
+    'default': dj_database_url.parse(
+        os.environ.get('DATABASE_URL'),
+        conn_max_age=int(os.environ.get('DATABASE_CONN_MAX_AGE', 600)),
+    )
 }
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Connection pool of each worker process, for the ASGI application where
+# persistent connections are not reused across requests. Requires
+# PostgreSQL with psycopg 3 and psycopg_pool installed, and replaces
+# persistent connections
+if 'DATABASE_POOL_MAX_SIZE' in os.environ:
+    if not DATABASES['default']['ENGINE'].startswith(
+        'django.db.backends.postgresql'
+    ):
+        raise ImproperlyConfigured(
+            'DATABASE_POOL_MAX_SIZE is set but connection pools are only '
+            'supported on PostgreSQL.'
+        )
+    if (
+        importlib.util.find_spec('psycopg') is None
+        or importlib.util.find_spec('psycopg_pool') is None
+    ):
+        raise ImproperlyConfigured(
+            'DATABASE_POOL_MAX_SIZE is set but connection pools require '
+            'psycopg 3 and psycopg_pool, install psycopg[pool].'
+        )
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(os.environ.get('DATABASE_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.environ.get('DATABASE_POOL_MAX_SIZE')),
+        # Seconds a request waits for a free connection
+        'timeout': int(os.environ.get('DATABASE_POOL_TIMEOUT', 10)),
+    }
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -0,0 +1,228 @@
+import threading
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from bookmarks.models import Bookmark, BookmarkFolder
+from comments.models import Comment
+from feed.models import FeedEntry
+from followers.models import Follower
+from likes.models import Like
+from posts.models import Post
+from .cache import cached_user_key
+from .images import ThreadPoolBackend, resolve_image_url
+from .middleware import QueryRecorder
+
+
+@override_settings(QUERY_PROFILER=True)
+class QueryProfilerMiddlewareTests(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='adam', password='pass')
+        Post.objects.create(owner=user, title='a title')
+
+    def test_server_timing_reports_queries(self):
+        with self.assertLogs('drf_api.queries', 'INFO') as logs:
+            response = self.client.get('/posts/', secure=True)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.assertIn('queries"', response['Server-Timing'])
+        profile = logs.records[0].query_profile
+        self.assertEqual(profile['path'], '/posts/')
+        self.assertGreater(profile['queries'], 0)
+        self.assertEqual(profile['n_plus_one'], [])
+
+    @override_settings(QUERY_PROFILER=False)
+    def test_disabled_by_default(self):
+        response = self.client.get('/posts/', secure=True)
+        self.assertNotIn('Server-Timing', response)
+
+
+class QueryRecorderTests(TestCase):
+    def record(self, statements):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            with connection.cursor() as cursor:
+                for sql, params in statements:
+                    cursor.execute(sql, params)
+        return recorder.profile(threshold=3)
+
+    def test_repeated_statements_with_differing_params_are_n_plus_one(self):
+        profile = self.record(
+            [('SELECT %s', [index]) for index in range(4)]
+        )
+        self.assertEqual(profile['queries'], 4)
+        self.assertEqual(profile['n_plus_one'], [
+            {'sql': 'SELECT %s', 'count': 4}
+        ])
+        self.assertEqual(profile['duplicates'], 0)
+
+    def test_identical_statements_are_duplicates(self):
+        profile = self.record([('SELECT %s', [1])] * 3)
+        self.assertEqual(profile['duplicates'], 2)
+        self.assertEqual(profile['n_plus_one'], [])
+
+
+class IndexUsageTests(TestCase):
+    """
+    The hot queries of the list endpoints are answered from an index.
+    On PostgreSQL sequential scans are disabled, as the planner would
+    prefer them for the tiny test tables.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.post = Post.objects.create(owner=self.user, title='a title')
+        self.folder = BookmarkFolder.objects.create(
+            owner=self.user, name='saved'
+        )
+
+    def assertUsesIndex(self, queryset, index_name):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = queryset.explain()
+        self.assertIn(index_name, plan)
+
+    def test_post_list(self):
+        self.assertUsesIndex(
+            Post.objects.order_by('-created_at', '-id')[:10],
+            'post_created_idx',
+        )
+
+    def test_posts_by_owner(self):
+        self.assertUsesIndex(
+            Post.objects.filter(owner=self.user).order_by('-created_at'),
+            'post_owner_created_idx',
+        )
+
+    def test_posts_by_likes(self):
+        self.assertUsesIndex(
+            Post.objects.order_by('-likes_count')[:10],
+            'post_likes_count_idx',
+        )
+
+    def test_comments_of_a_post(self):
+        self.assertUsesIndex(
+            Comment.objects.filter(post=self.post).order_by('-created_at'),
+            'comment_post_created_idx',
+        )
+
+    def test_bookmarks_of_a_user(self):
+        self.assertUsesIndex(
+            Bookmark.objects.filter(owner=self.user).order_by('-created_at'),
+            'bookmark_owner_created_idx',
+        )
+
+    def test_bookmarks_in_a_folder(self):
+        self.assertUsesIndex(
+            Bookmark.objects.filter(
+                owner=self.user, folder=self.folder
+            ).order_by('-created_at'),
+            'bookmark_folder_created_idx',
+        )
+
+    def test_followers_of_a_user(self):
+        self.assertUsesIndex(
+            Follower.objects.filter(
+                followed=self.user
+            ).values_list('owner_id', flat=True),
+            'follower_followed_owner_idx',
+        )
+
+    def test_like_of_a_viewer(self):
+        self.assertUsesIndex(
+            Like.objects.filter(owner=self.user, post=self.post),
+            'likes_like_owner_id_post_id',
+        )
+
+    def test_home_feed(self):
+        self.assertUsesIndex(
+            FeedEntry.objects.filter(owner=self.user).order_by('-created_at'),
+            'feed_owner_created_idx',
+        )
+
+
+class ThreadPoolBackendTests(SimpleTestCase):
+    def test_tasks_run_on_worker_threads(self):
+        backend = ThreadPoolBackend()
+        names = []
+        backend.submit(lambda: names.append(threading.current_thread().name))
+        backend.executor.shutdown(wait=True)
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names[0].startswith('image-pipeline'))
+
+    def test_failing_tasks_are_logged(self):
+        backend = ThreadPoolBackend()
+        with self.assertLogs('drf_api.images', 'ERROR'):
+            backend.submit(lambda: 1 / 0)
+            backend.executor.shutdown(wait=True)
+
+
+class ImageURLCacheTests(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='adam', password='pass')
+        post = Post.objects.create(owner=user, title='a title')
+        for index in range(5):
+            Comment.objects.create(owner=user, post=post, content='hi')
+        resolve_image_url.cache_clear()
+
+    def test_urls_are_resolved_once_per_request_and_process(self):
+        response = self.client.get('/comments/', secure=True)
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertEqual(resolve_image_url.cache_info().misses, 1)
+        self.assertEqual(resolve_image_url.cache_info().hits, 0)
+        second = self.client.get('/comments/?page=1', secure=True)
+        self.assertEqual(
+            second.data['results'][0]['profile_image'],
+            response.data['results'][0]['profile_image'],
+        )
+        self.assertEqual(resolve_image_url.cache_info().misses, 1)
+        self.assertEqual(resolve_image_url.cache_info().hits, 1)
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+    def get_current_user(self):
+        return self.client.get('/dj-rest-auth/user/', secure=True)
+
+    def test_cached_user_and_profile_need_no_queries(self):
+        self.get_current_user()
+        with self.assertNumQueries(0):
+            response = self.get_current_user()
+        self.assertEqual(response.data['username'], 'adam')
+        self.assertEqual(response.data['profile_id'], self.user.profile.id)
+
+    def test_profile_changes_are_read_on_the_next_request(self):
+        self.get_current_user()
+        profile = self.user.profile
+        profile.image = 'profiles/new'
+        profile.save()
+        response = self.get_current_user()
+        self.assertTrue(response.data['profile_image'].endswith('new'))
+
+    def test_inactive_users_are_rejected_once_saved(self):
+        self.get_current_user()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get_current_user().status_code, 401)
+
+    def test_saves_outside_requests_drop_the_cached_user(self):
+        key = cached_user_key(self.user.pk)
+        self.user.set_password('new')
+        self.user.save()
+        self.assertNotEqual(cached_user_key(self.user.pk), key)
+
+    def test_logout_drops_the_cached_user(self):
+        self.get_current_user()
+        self.client.post('/dj-rest-auth/logout/', secure=True)
+        with CaptureQueriesContext(connection) as context:
+            self.get_current_user()
+        self.assertGreater(len(context.captured_queries), 0)
@@ -15,12 +15,16 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from .views import root_route, logout_route
+from .views import (
+    root_route, logout_route, cache_stats_route, viewer_state_route
+)
 from .registration import CustomRegisterView
 
 urlpatterns = [
     path('', root_route),
     path('admin/', admin.site.urls),
+    path('cache-stats/', cache_stats_route),
+    path('me/state/', viewer_state_route),
     path('api-auth/', include('rest_framework.urls')),
     path('dj-rest-auth/logout/', logout_route),
     path('dj-rest-auth/', include('dj_rest_auth.urls')),
@@ -30,5 +34,6 @@ urlpatterns = [
     path('', include('likes.urls')),
     path('', include('followers.urls')),
     path('', include('bookmarks.urls')),
+    path('', include('feed.urls')),
     path('', include('profiles.urls')),
 ]
@@ -2,6 +2,7 @@
 Utility functions for authentication and cookie management
 """
 from django.conf import settings
+from django.db.models import F
 
 def clear_auth_cookies(response):
     """
@@ -49,3 +50,30 @@ def get_auth_cookie_settings():
         'path': '/',
         'domain': None  # Let browser determine domain
     }
+
+
+def adjust_counter(queryset, field, delta):
+    """
+    Atomically adds delta to a denormalized counter column on every row
+    of the queryset, without ever taking the counter below zero
+    """
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def exclude_from_save(instance, kwargs, excluded):
+    """
+    Limits a full save of an existing row to the columns not in
+    excluded, such as counters only written with adjust_counter, so the
+    values loaded with the instance never overwrite concurrent updates
+    """
+    if (
+        kwargs.get('update_fields') is None
+        and not kwargs.get('force_insert')
+        and not instance._state.adding
+    ):
+        kwargs['update_fields'] = [
+            field.name for field in instance._meta.concrete_fields
+            if not field.primary_key and field.name not in excluded
+        ]
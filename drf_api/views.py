@@ -1,6 +1,9 @@
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from django.middleware.csrf import rotate_token
+from .cache import cache_stats, invalidate_cached_user
+from .serializers import ViewerStateQuerySerializer
 from .utils import clear_auth_cookies
 from .settings import (
     JWT_AUTH_COOKIE, JWT_AUTH_REFRESH_COOKIE, JWT_AUTH_SAMESITE,
@@ -24,7 +27,78 @@ def logout_route(request):
     """
     Custom logout view using unified cookie clearing
     """
+    if request.user.is_authenticated:
+        invalidate_cached_user(request.user.pk)
     response = Response()
     response = clear_auth_cookies(response)
     rotate_token(request)
     return response
+
+
+@api_view()
+@permission_classes([IsAdminUser])
+def cache_stats_route(request):
+    """
+    Anonymous response cache hit and miss counters, for staff only
+    """
+    return Response(cache_stats())
+
+
+@api_view()
+@permission_classes([IsAuthenticated])
+def viewer_state_route(request):
+    """
+    Like, bookmark and follow state of the current user for the posts
+    and profiles given as ?posts=1,2&profiles=3, in three queries
+    however many ids are passed
+    """
+    from bookmarks.models import Bookmark
+    from likes.models import Like
+    from profiles.models import Profile
+
+    serializer = ViewerStateQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    post_ids = list(dict.fromkeys(serializer.validated_data.get('posts', [])))
+    profile_ids = list(
+        dict.fromkeys(serializer.validated_data.get('profiles', []))
+    )
+    user = request.user
+
+    posts = []
+    if post_ids:
+        like_ids = dict(
+            Like.objects.filter(
+                owner=user, post_id__in=post_ids
+            ).values_list('post_id', 'id')
+        )
+        folder_ids = {}
+        bookmarks = Bookmark.objects.filter(
+            owner=user, post_id__in=post_ids
+        ).order_by('folder_id').values_list('post_id', 'folder_id')
+        for post_id, folder_id in bookmarks:
+            folder_ids.setdefault(post_id, []).append(folder_id)
+        posts = [
+            {
+                'id': post_id,
+                'like_id': like_ids.get(post_id),
+                'bookmark_folder_ids': folder_ids.get(post_id, []),
+            }
+            for post_id in post_ids
+        ]
+
+    profiles = []
+    if profile_ids:
+        following_ids = dict(
+            Profile.objects.filter(
+                pk__in=profile_ids
+            ).with_viewer_state(user).values_list('pk', 'following_id')
+        )
+        profiles = [
+            {
+                'id': profile_id,
+                'following_id': following_ids.get(profile_id),
+            }
+            for profile_id in profile_ids
+        ]
+
+    return Response({'posts': posts, 'profiles': profiles})
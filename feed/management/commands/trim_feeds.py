@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from feed.utils import trim_long_feeds
+
+
+class Command(BaseCommand):
+    """
+    Trims home feeds back to FEED_MAX_LENGTH entries, meant to run
+    periodically (e.g. hourly from a scheduler)
+    """
+    help = 'Delete feed entries beyond FEED_MAX_LENGTH'
+
+    def handle(self, *args, **options):
+        deleted = trim_long_feeds()
+        self.stdout.write(f'Removed {deleted} feed entries')
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_feeds(apps, schema_editor):
+    FeedEntry = apps.get_model('feed', 'FeedEntry')
+    Follower = apps.get_model('followers', 'Follower')
+    Post = apps.get_model('posts', 'Post')
+
+    for follower in Follower.objects.iterator():
+        posts = Post.objects.filter(
+            owner_id=follower.followed_id
+        ).order_by('-created_at').values_list('pk', 'created_at')
+        FeedEntry.objects.bulk_create(
+            [
+                FeedEntry(
+                    owner_id=follower.owner_id,
+                    post_id=post_id,
+                    created_at=created_at,
+                )
+                for post_id, created_at in posts[:settings.FEED_MAX_LENGTH]
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('posts', '0014_post_likes_count_post_comments_count'),
+        ('followers', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='posts.post')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['owner', '-created_at'], name='feed_owner_created_idx')],
+                'unique_together': {('owner', 'post')},
+            },
+        ),
+        migrations.RunPython(populate_feeds, migrations.RunPython.noop),
+    ]
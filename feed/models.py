@@ -0,0 +1,33 @@
+from django.db import models
+from django.contrib.auth.models import User
+from posts.models import Post
+
+
+class FeedEntry(models.Model):
+    """
+    FeedEntry model, a materialized row of a user's home feed.
+    'owner' is the User whose feed the entry belongs to and 'post' is a
+    Post by someone they follow. 'created_at' is copied from the post so
+    a feed page is a single indexed range over (owner, created_at).
+    Entries are fanned out when posts are created, see feed.utils.
+    """
+    owner = models.ForeignKey(
+        User, related_name='feed_entries', on_delete=models.CASCADE
+    )
+    post = models.ForeignKey(
+        Post, related_name='feed_entries', on_delete=models.CASCADE
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+        unique_together = ['owner', 'post']
+        indexes = [
+            models.Index(
+                fields=['owner', '-created_at'],
+                name='feed_owner_created_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.owner} {self.post}'
@@ -0,0 +1,75 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from posts.models import Post
+from .models import FeedEntry
+
+
+class FeedTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(username='brian', password='x')
+
+    def feed_ids(self):
+        self.client.force_authenticate(user=self.adam)
+        response = self.client.get('/feed/', secure=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post['id'] for post in response.data['results']]
+
+    def follow(self):
+        self.client.force_authenticate(user=self.adam)
+        response = self.client.post(
+            '/followers/', {'followed': self.brian.id}, secure=True
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response.data['id']
+
+    def test_new_posts_are_fanned_out_to_followers(self):
+        self.follow()
+        self.client.force_authenticate(user=self.brian)
+        response = self.client.post(
+            '/posts/', {'title': 'a title'}, secure=True
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.feed_ids(), [response.data['id']])
+
+    def test_following_backfills_and_unfollowing_prunes(self):
+        post = Post.objects.create(owner=self.brian, title='a title')
+        follower_id = self.follow()
+        self.assertEqual(self.feed_ids(), [post.id])
+        self.client.delete(f'/followers/{follower_id}/', secure=True)
+        self.assertEqual(self.feed_ids(), [])
+
+    @override_settings(FEED_MAX_LENGTH=2)
+    def test_feeds_are_trimmed_to_the_configured_length(self):
+        posts = [
+            Post.objects.create(owner=self.brian, title=f'post {index}')
+            for index in range(3)
+        ]
+        self.follow()
+        self.assertEqual(FeedEntry.objects.filter(owner=self.adam).count(), 2)
+        self.assertEqual(self.feed_ids(), [posts[2].id, posts[1].id])
+
+    @override_settings(FEED_MAX_LENGTH=2)
+    def test_long_feeds_are_trimmed_periodically(self):
+        self.follow()
+        self.client.force_authenticate(user=self.brian)
+        post_ids = [
+            self.client.post(
+                '/posts/', {'title': f'post {index}'}, secure=True
+            ).data['id']
+            for index in range(3)
+        ]
+        # Fanning out never trims
+        self.assertEqual(FeedEntry.objects.filter(owner=self.adam).count(), 3)
+        out = StringIO()
+        call_command('trim_feeds', stdout=out)
+        self.assertIn('Removed 1 feed entries', out.getvalue())
+        self.assertEqual(self.feed_ids(), [post_ids[2], post_ids[1]])
+
+    def test_feed_requires_authentication(self):
+        response = self.client.get('/feed/', secure=True)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
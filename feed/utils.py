@@ -0,0 +1,100 @@
+"""
+Fan-out on write helpers maintaining the materialized home feeds
+"""
+from django.conf import settings
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from followers.models import Follower
+from posts.models import Post
+from .models import FeedEntry
+
+
+def trim_feeds(owner_ids):
+    """
+    Deletes everything beyond the newest FEED_MAX_LENGTH entries
+    of each given user's feed, returning the number of entries deleted
+    """
+    ranked = FeedEntry.objects.filter(owner_id__in=owner_ids).annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=F('owner_id'),
+            order_by=[F('created_at').desc(), F('id').desc()],
+        )
+    ).filter(position__gt=settings.FEED_MAX_LENGTH)
+    return FeedEntry.objects.filter(
+        pk__in=list(ranked.values_list('pk', flat=True))
+    ).delete()[0]
+
+
+def trim_long_feeds(batch_size=500):
+    """
+    Trims the feeds holding more than FEED_MAX_LENGTH entries, batch_size
+    feeds at a time. New posts are fanned out without trimming, so this
+    runs periodically instead, see the trim_feeds command.
+    Returns the number of entries deleted.
+    """
+    owner_ids = list(
+        FeedEntry.objects.values('owner_id').annotate(
+            entries=Count('id')
+        ).filter(
+            entries__gt=settings.FEED_MAX_LENGTH
+        ).values_list('owner_id', flat=True)
+    )
+    return sum(
+        trim_feeds(owner_ids[start:start + batch_size])
+        for start in range(0, len(owner_ids), batch_size)
+    )
+
+
+def fan_out_post(post):
+    """
+    Adds a new post to the feeds of everyone following its owner.
+    Feeds are not trimmed here, as that reads every follower's whole
+    feed, so they may exceed FEED_MAX_LENGTH until trim_long_feeds runs.
+    """
+    follower_ids = list(
+        Follower.objects.filter(
+            followed_id=post.owner_id
+        ).values_list('owner_id', flat=True)
+    )
+    if not follower_ids:
+        return
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(owner_id=owner_id, post=post, created_at=post.created_at)
+            for owner_id in follower_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def backfill_feed(owner_id, followed_ids):
+    """
+    Copies the newest posts of newly followed users into the feed
+    of the user who followed them
+    """
+    posts = Post.objects.filter(
+        owner_id__in=followed_ids
+    ).order_by('-created_at').values_list('pk', 'created_at')
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                owner_id=owner_id,
+                post_id=post_id,
+                created_at=created_at,
+            )
+            for post_id, created_at in posts[:settings.FEED_MAX_LENGTH]
+        ],
+        ignore_conflicts=True,
+    )
+    trim_feeds([owner_id])
+
+
+def prune_feed(owner_id, followed_ids):
+    """
+    Removes unfollowed users' posts from the feed of the user who
+    unfollowed them
+    """
+    FeedEntry.objects.filter(
+        owner_id=owner_id, post__owner_id__in=followed_ids
+    ).delete()
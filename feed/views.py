@@ -0,0 +1,40 @@
+from django.db.models import F
+from rest_framework import generics, permissions
+from drf_api.fieldsets import selected_fields
+from drf_api.pagination import CreatedAtCursorPagination, FeedPagination
+from posts.models import Post
+from posts.serializers import PostSerializer
+
+
+class FeedEntryCursorPagination(CreatedAtCursorPagination):
+    """
+    Cursor pagination keyed on the feed entry timestamp
+    """
+    ordering = ('-feed_created_at', '-id')
+
+
+class FeedEntryPagination(FeedPagination):
+    cursor_pagination_class = FeedEntryCursorPagination
+
+
+class FeedList(generics.ListAPIView):
+    """
+    List the logged in user's home feed, i.e. posts by the users they
+    follow, read from their materialized feed entries.
+    """
+    serializer_class = PostSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FeedEntryPagination
+
+    def get_queryset(self):
+        """
+        Reads one range of the user's feed entries, loading the posts
+        with the shared posts queryset builder
+        """
+        user = self.request.user
+        fields = selected_fields(self.request, PostSerializer)
+        return Post.objects.for_feed(user, fields).filter(
+            feed_entries__owner=user
+        ).annotate(
+            feed_created_at=F('feed_entries__created_at')
+        ).order_by('-feed_created_at', '-id')
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('followers', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # Build the new indexes before dropping the FK indexes they replace
+    operations = [
+        migrations.AddIndex(
+            model_name='follower',
+            index=models.Index(fields=['followed', 'owner'], name='follower_followed_owner_idx'),
+        ),
+        migrations.AlterField(
+            model_name='follower',
+            name='followed',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='followed', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='follower',
+            name='owner',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='following', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
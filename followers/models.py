@@ -1,5 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
+from profiles.models import Profile
+from drf_api.utils import adjust_counter
 
 # Create your models here.
 
@@ -13,17 +16,56 @@ class Follower(models.Model):
     between 'owner' and 'followed' who both are User model instances.
     'unique_together' makes sure a user can't 'double follow' the same user.
     """
+    # Indexed by the unique (owner, followed) and the (followed, owner)
+    # indexes, which answer who a user follows and who follows a user
     owner = models.ForeignKey(
-        User, related_name='following', on_delete=models.CASCADE
+        User, related_name='following', on_delete=models.CASCADE,
+        db_index=False,
     )
     followed = models.ForeignKey(
-        User, related_name='followed', on_delete=models.CASCADE
+        User, related_name='followed', on_delete=models.CASCADE,
+        db_index=False,
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
         unique_together = ['owner', 'followed']
+        indexes = [
+            models.Index(
+                fields=['followed', 'owner'],
+                name='follower_followed_owner_idx',
+            ),
+        ]
 
     def __str__(self):
         return f'{self.owner} {self.followed}'
+
+
+def adjust_follow_counters(follower, delta):
+    """
+    Updates followers_count on the followed profile and following_count
+    on the owner's profile together
+    """
+    with transaction.atomic():
+        adjust_counter(
+            Profile.objects.filter(owner_id=follower.followed_id),
+            'followers_count', delta
+        )
+        adjust_counter(
+            Profile.objects.filter(owner_id=follower.owner_id),
+            'following_count', delta
+        )
+
+
+def increment_follow_counters(sender, instance, created, **kwargs):
+    if created:
+        adjust_follow_counters(instance, 1)
+
+
+def decrement_follow_counters(sender, instance, **kwargs):
+    adjust_follow_counters(instance, -1)
+
+
+post_save.connect(increment_follow_counters, sender=Follower)
+post_delete.connect(decrement_follow_counters, sender=Follower)
@@ -22,3 +22,15 @@ class FollowerSerializer(serializers.ModelSerializer):
             return super().create(validated_data)
         except IntegrityError:
             raise serializers.ValidationError({'detail': 'possible duplicate'})
+
+
+class FollowerBatchSerializer(serializers.Serializer):
+    """
+    Serializer for batch follow and unfollow requests
+    Accepts a list of up to 100 user ids
+    """
+    followed = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
@@ -1,3 +1,101 @@
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.db import transaction
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+from feed.models import FeedEntry
+from posts.models import Post
+from profiles.models import Profile
+from .models import Follower
 
-# Create your tests here.
+
+class FollowerCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.other = User.objects.create_user(username='brian', password='x')
+
+    def assertCounts(self, followers_count, following_count):
+        followed = Profile.objects.get(owner=self.other)
+        following = Profile.objects.get(owner=self.user)
+        self.assertEqual(followed.followers_count, followers_count)
+        self.assertEqual(following.following_count, following_count)
+
+    def test_following_increments_both_profiles(self):
+        Follower.objects.create(owner=self.user, followed=self.other)
+        self.assertCounts(1, 1)
+
+    def test_unfollowing_decrements_both_profiles(self):
+        follower = Follower.objects.create(
+            owner=self.user, followed=self.other
+        )
+        follower.delete()
+        self.assertCounts(0, 0)
+
+
+class FollowerBatchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.others = [
+            User.objects.create_user(username=name, password='x')
+            for name in ('brian', 'carl')
+        ]
+        Post.objects.create(owner=self.others[0], title='a title')
+        self.client.force_authenticate(self.user)
+
+    def test_batch_follow_updates_counters_and_feed(self):
+        ids = [user.id for user in self.others]
+        response = self.client.post(
+            '/followers/batch/', {'followed': ids + [9999]},
+            format='json', secure=True,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = [item['status'] for item in response.data['results']]
+        self.assertEqual(statuses, ['created', 'created', 'not_found'])
+        self.assertEqual(
+            Profile.objects.get(owner=self.user).following_count, 2
+        )
+        self.assertEqual(
+            Profile.objects.get(owner=self.others[0]).followers_count, 1
+        )
+        self.assertEqual(FeedEntry.objects.filter(owner=self.user).count(), 1)
+
+    def test_batch_follow_counts_only_its_own_inserts(self):
+        first, second = self.others
+        calls = []
+
+        def follow_concurrently(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                # Another request follows the first user after it was read,
+                # right before the insert
+                Follower.objects.create(owner=self.user, followed=first)
+            return transaction.atomic(*args, **kwargs)
+
+        with patch('followers.views.transaction') as views_transaction:
+            views_transaction.atomic.side_effect = follow_concurrently
+            response = self.client.post(
+                '/followers/batch/', {'followed': [first.id, second.id]},
+                format='json', secure=True,
+            )
+        statuses = [item['status'] for item in response.data['results']]
+        self.assertEqual(statuses, ['exists', 'created'])
+        self.assertEqual(
+            Profile.objects.get(owner=self.user).following_count, 2
+        )
+        self.assertEqual(Profile.objects.get(owner=first).followers_count, 1)
+
+    def test_batch_unfollow_prunes_feed(self):
+        ids = [user.id for user in self.others]
+        self.client.post(
+            '/followers/batch/', {'followed': ids}, format='json', secure=True
+        )
+        response = self.client.delete(
+            '/followers/batch/', {'followed': ids}, format='json', secure=True
+        )
+        statuses = [item['status'] for item in response.data['results']]
+        self.assertEqual(statuses, ['deleted', 'deleted'])
+        self.assertEqual(
+            Profile.objects.get(owner=self.user).following_count, 0
+        )
+        self.assertFalse(FeedEntry.objects.filter(owner=self.user).exists())
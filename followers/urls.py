@@ -3,5 +3,6 @@ from followers import views
 
 urlpatterns = [
     path('followers/', views.FollowerList.as_view()),
+    path('followers/batch/', views.FollowerBatch.as_view()),
     path('followers/<int:pk>/', views.FollowerDetail.as_view())
 ]
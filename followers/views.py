@@ -1,8 +1,16 @@
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from django.shortcuts import render
 from rest_framework import generics, permissions
+from rest_framework.response import Response
+from drf_api.cache import bump_cache_version
 from drf_api.permissions import IsOwnerOrReadOnly
+from drf_api.pagination import FeedPagination
+from drf_api.utils import adjust_counter
+from feed.utils import backfill_feed, prune_feed
+from profiles.models import Profile
 from .models import Follower
-from .serializers import FollowerSerializer
+from .serializers import FollowerSerializer, FollowerBatchSerializer
 
 # Create your views here.
 
@@ -15,11 +23,16 @@ class FollowerList(generics.ListCreateAPIView):
     Perform_create: associate the current logged in user with a follower.
     """
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = FeedPagination
     queryset = Follower.objects.all()
     serializer_class = FollowerSerializer
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        """
+        Follows a user and backfills their recent posts into the feed
+        """
+        follower = serializer.save(owner=self.request.user)
+        backfill_feed(follower.owner_id, [follower.followed_id])
 
 
 class FollowerDetail(generics.RetrieveDestroyAPIView):
@@ -31,3 +44,121 @@ class FollowerDetail(generics.RetrieveDestroyAPIView):
     permission_classes = [IsOwnerOrReadOnly]
     queryset = Follower.objects.all()
     serializer_class = FollowerSerializer
+
+    def perform_destroy(self, instance):
+        """
+        Unfollows a user and removes their posts from the feed
+        """
+        prune_feed(instance.owner_id, [instance.followed_id])
+        instance.delete()
+
+
+class FollowerBatch(generics.GenericAPIView):
+    """
+    Follow (POST) or unfollow (DELETE) a list of users in one request.
+    Returns the outcome for each user id in the order given.
+    Everything runs in one transaction with a fixed number of queries.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = FollowerBatchSerializer
+    insert_attempts = 3
+
+    def get_user_ids(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return list(dict.fromkeys(serializer.validated_data['followed']))
+
+    def insert_follows(self, user, user_ids):
+        """
+        Follows the existing users in user_ids not followed by user yet.
+        Returns the ids of the existing users, of those already followed
+        and of those followed now. A concurrent request following some
+        of the same users makes the insert fail, it is then retried with
+        the follows read again, so only rows inserted here are counted.
+        """
+        for attempt in range(self.insert_attempts):
+            found = set(
+                User.objects.filter(
+                    pk__in=user_ids
+                ).values_list('pk', flat=True)
+            )
+            following = set(
+                Follower.objects.filter(
+                    owner=user, followed_id__in=user_ids
+                ).values_list('followed_id', flat=True)
+            )
+            created = [
+                user_id for user_id in user_ids
+                if user_id in found and user_id not in following
+            ]
+            if not created:
+                break
+            try:
+                with transaction.atomic():
+                    # bulk_create skips the signals maintaining profile
+                    # counters
+                    Follower.objects.bulk_create([
+                        Follower(owner=user, followed_id=user_id)
+                        for user_id in created
+                    ])
+            except IntegrityError:
+                if attempt == self.insert_attempts - 1:
+                    raise
+            else:
+                break
+        return found, following, created
+
+    def post(self, request, *args, **kwargs):
+        user_ids = self.get_user_ids(request)
+        user = request.user
+        with transaction.atomic():
+            found, following, created = self.insert_follows(user, user_ids)
+            if created:
+                adjust_counter(
+                    Profile.objects.filter(owner_id__in=created),
+                    'followers_count', 1
+                )
+                adjust_counter(
+                    Profile.objects.filter(owner=user),
+                    'following_count', len(created)
+                )
+                backfill_feed(user.id, created)
+                bump_cache_version(Follower)
+            follower_ids = dict(
+                Follower.objects.filter(
+                    owner=user, followed_id__in=user_ids
+                ).values_list('followed_id', 'id')
+            )
+
+        results = []
+        for user_id in user_ids:
+            if user_id not in found:
+                outcome = 'not_found'
+            elif user_id in following:
+                outcome = 'exists'
+            else:
+                outcome = 'created'
+            results.append({
+                'followed': user_id,
+                'status': outcome,
+                'following_id': follower_ids.get(user_id),
+            })
+        return Response({'results': results})
+
+    def delete(self, request, *args, **kwargs):
+        user_ids = self.get_user_ids(request)
+        with transaction.atomic():
+            follows = Follower.objects.filter(
+                owner=request.user, followed_id__in=user_ids
+            )
+            deleted = set(follows.values_list('followed_id', flat=True))
+            follows.delete()
+            prune_feed(request.user.id, deleted)
+
+        return Response({'results': [
+            {
+                'followed': user_id,
+                'status': 'deleted' if user_id in deleted else 'not_found',
+            }
+            for user_id in user_ids
+        ]})
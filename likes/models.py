@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
 from posts.models import Post
+from drf_api.utils import adjust_counter
 
 # Create your models here.
 
@@ -11,7 +13,9 @@ class Like(models.Model):
     'owner' is a User instance and 'post' is a Post instance.
     'unique_together' makes sure a user can't like the same post twice.
     """
-    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Indexed by the unique (owner, post) index, which also answers the
+    # like_id lookups of PostQuerySet.with_viewer_state
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     post = models.ForeignKey(
         Post, related_name='likes', on_delete=models.CASCADE
     )
@@ -23,3 +27,20 @@ class Like(models.Model):
 
     def __str__(self):
         return f'{self.owner} {self.post}'
+
+
+def increment_likes_count(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter(
+            Post.objects.filter(pk=instance.post_id), 'likes_count', 1
+        )
+
+
+def decrement_likes_count(sender, instance, **kwargs):
+    adjust_counter(
+        Post.objects.filter(pk=instance.post_id), 'likes_count', -1
+    )
+
+
+post_save.connect(increment_likes_count, sender=Like)
+post_delete.connect(decrement_likes_count, sender=Like)
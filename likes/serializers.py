@@ -21,3 +21,15 @@ class LikeSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({
                 'detail': 'possible duplicate'
             })
+
+
+class LikeBatchSerializer(serializers.Serializer):
+    """
+    Serializer for batch like and unlike requests
+    Accepts a list of up to 100 post ids
+    """
+    posts = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
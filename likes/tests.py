@@ -1,3 +1,109 @@
+from unittest.mock import patch
+from django.contrib.auth.models import User
+from django.db import connection, transaction
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+from posts.models import Post
+from .models import Like
 
-# Create your tests here.
+
+class LikeCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.post = Post.objects.create(owner=self.user, title='a title')
+
+    def test_creating_a_like_increments_likes_count(self):
+        Like.objects.create(owner=self.user, post=self.post)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+
+    def test_deleting_a_like_decrements_likes_count(self):
+        like = Like.objects.create(owner=self.user, post=self.post)
+        like.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 0)
+
+
+class LikeBatchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.posts = [
+            Post.objects.create(owner=self.user, title=f'post {i}')
+            for i in range(3)
+        ]
+        self.client.force_authenticate(self.user)
+
+    def test_batch_like_reports_each_outcome(self):
+        first, second, third = self.posts
+        Like.objects.create(owner=self.user, post=first)
+        response = self.client.post(
+            '/likes/batch/',
+            {'posts': [first.id, second.id, third.id, 9999]},
+            format='json', secure=True,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        statuses = [item['status'] for item in response.data['results']]
+        self.assertEqual(
+            statuses, ['exists', 'created', 'created', 'not_found']
+        )
+        self.assertEqual(Like.objects.filter(owner=self.user).count(), 3)
+        second.refresh_from_db()
+        self.assertEqual(second.likes_count, 1)
+
+    def test_batch_like_counts_only_its_own_inserts(self):
+        first, second, _ = self.posts
+        calls = []
+
+        def like_concurrently(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                # Another request likes the first post after it was read,
+                # right before the insert
+                Like.objects.create(owner=self.user, post=first)
+            return transaction.atomic(*args, **kwargs)
+
+        with patch('likes.views.transaction') as views_transaction:
+            views_transaction.atomic.side_effect = like_concurrently
+            response = self.client.post(
+                '/likes/batch/', {'posts': [first.id, second.id]},
+                format='json', secure=True,
+            )
+        statuses = [item['status'] for item in response.data['results']]
+        self.assertEqual(statuses, ['exists', 'created'])
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.likes_count, 1)
+        self.assertEqual(second.likes_count, 1)
+
+    def test_batch_like_runs_a_fixed_number_of_queries(self):
+        ids = [post.id for post in self.posts]
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(
+                '/likes/batch/', {'posts': ids[:1]}, format='json', secure=True
+            )
+        Like.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(
+                '/likes/batch/', {'posts': ids}, format='json', secure=True
+            )
+        self.assertEqual(len(small), len(large))
+
+    def test_batch_unlike_deletes_and_decrements(self):
+        first, second, _ = self.posts
+        Like.objects.create(owner=self.user, post=first)
+        response = self.client.delete(
+            '/likes/batch/', {'posts': [first.id, second.id]},
+            format='json', secure=True,
+        )
+        statuses = [item['status'] for item in response.data['results']]
+        self.assertEqual(statuses, ['deleted', 'not_found'])
+        first.refresh_from_db()
+        self.assertEqual(first.likes_count, 0)
+
+    def test_batch_rejects_empty_list(self):
+        response = self.client.post(
+            '/likes/batch/', {'posts': []}, format='json', secure=True
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,8 +1,14 @@
+from django.db import IntegrityError, transaction
 from django.shortcuts import render
 from rest_framework import generics, permissions
+from rest_framework.response import Response
+from drf_api.cache import bump_cache_version
 from drf_api.permissions import IsOwnerOrReadOnly
+from drf_api.pagination import FeedPagination
+from drf_api.utils import adjust_counter
 from likes.models import Like
-from likes.serializers import LikeSerializer
+from likes.serializers import LikeSerializer, LikeBatchSerializer
+from posts.models import Post
 
 # Create your views here.
 
@@ -12,6 +18,7 @@ class LikeList(generics.ListCreateAPIView):
     List likes or create a like if logged in.
     """
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = FeedPagination
     serializer_class = LikeSerializer
     queryset = Like.objects.all()
 
@@ -26,3 +33,107 @@ class LikeDetail(generics.RetrieveDestroyAPIView):
     permission_classes = [IsOwnerOrReadOnly]
     serializer_class = LikeSerializer
     queryset = Like.objects.all()
+
+
+class LikeBatch(generics.GenericAPIView):
+    """
+    Like (POST) or unlike (DELETE) a list of posts in one request.
+    Returns the outcome for each post id in the order given.
+    Everything runs in one transaction with a fixed number of queries.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = LikeBatchSerializer
+    insert_attempts = 3
+
+    def get_post_ids(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return list(dict.fromkeys(serializer.validated_data['posts']))
+
+    def insert_likes(self, user, post_ids):
+        """
+        Likes the existing posts in post_ids not liked by user yet.
+        Returns the ids of the existing posts, of those already liked
+        and of those liked now. A concurrent request liking some of the
+        same posts makes the insert fail, it is then retried with the
+        likes read again, so only rows inserted here are counted.
+        """
+        for attempt in range(self.insert_attempts):
+            found = set(
+                Post.objects.filter(
+                    pk__in=post_ids
+                ).values_list('pk', flat=True)
+            )
+            liked = set(
+                Like.objects.filter(
+                    owner=user, post_id__in=post_ids
+                ).values_list('post_id', flat=True)
+            )
+            created = [
+                post_id for post_id in post_ids
+                if post_id in found and post_id not in liked
+            ]
+            if not created:
+                break
+            try:
+                with transaction.atomic():
+                    # bulk_create skips the signals maintaining
+                    # likes_count
+                    Like.objects.bulk_create([
+                        Like(owner=user, post_id=post_id)
+                        for post_id in created
+                    ])
+            except IntegrityError:
+                if attempt == self.insert_attempts - 1:
+                    raise
+            else:
+                break
+        return found, liked, created
+
+    def post(self, request, *args, **kwargs):
+        post_ids = self.get_post_ids(request)
+        user = request.user
+        with transaction.atomic():
+            found, liked, created = self.insert_likes(user, post_ids)
+            if created:
+                adjust_counter(
+                    Post.objects.filter(pk__in=created), 'likes_count', 1
+                )
+                bump_cache_version(Like)
+            like_ids = dict(
+                Like.objects.filter(
+                    owner=user, post_id__in=post_ids
+                ).values_list('post_id', 'id')
+            )
+
+        results = []
+        for post_id in post_ids:
+            if post_id not in found:
+                outcome = 'not_found'
+            elif post_id in liked:
+                outcome = 'exists'
+            else:
+                outcome = 'created'
+            results.append({
+                'post': post_id,
+                'status': outcome,
+                'like_id': like_ids.get(post_id),
+            })
+        return Response({'results': results})
+
+    def delete(self, request, *args, **kwargs):
+        post_ids = self.get_post_ids(request)
+        with transaction.atomic():
+            likes = Like.objects.filter(
+                owner=request.user, post_id__in=post_ids
+            )
+            deleted = set(likes.values_list('post_id', flat=True))
+            likes.delete()
+
+        return Response({'results': [
+            {
+                'post': post_id,
+                'status': 'deleted' if post_id in deleted else 'not_found',
+            }
+            for post_id in post_ids
+        ]})
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from posts.trending import compact_tag_usage
+
+
+class Command(BaseCommand):
+    """
+    Rolls the tag trending window over, meant to run periodically
+    (e.g. daily from a scheduler)
+    """
+    help = 'Expire old tag usage buckets and recompute trending scores'
+
+    def handle(self, *args, **options):
+        expired = compact_tag_usage()
+        self.stdout.write(f'Removed {expired} expired tag usage bucket(s)')
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the full-text search document of every post, e.g. after
+    users have been renamed
+    """
+    help = 'Rebuild the search documents used by post full-text search'
+
+    def handle(self, *args, **options):
+        posts = Post.objects.select_related('owner').prefetch_related('tags')
+        rebuilt = 0
+        for post in posts.iterator(chunk_size=500):
+            document = post.build_search_document()
+            if document != post.search_document:
+                Post.objects.filter(pk=post.pk).update(
+                    search_document=document
+                )
+                rebuilt += 1
+        self.stdout.write(f'Rebuilt {rebuilt} search document(s)')
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from comments.models import Comment
+from likes.models import Like
+from posts.models import Post
+
+
+def count_of(model):
+    """
+    Correlated subquery counting the rows of model that belong to a post
+    """
+    counts = model.objects.filter(
+        post=OuterRef('pk')
+    ).order_by().values('post').annotate(total=Count('pk'))
+    return Coalesce(Subquery(counts.values('total')), 0)
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the denormalized likes_count and comments_count on posts
+    and repairs any that have drifted from the real totals
+    """
+    help = 'Recompute and repair post likes_count and comments_count'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many posts have drifted',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            drifted = Post.objects.annotate(
+                actual_likes=count_of(Like),
+                actual_comments=count_of(Comment),
+            ).exclude(
+                likes_count=F('actual_likes'),
+                comments_count=F('actual_comments'),
+            ).values('pk')
+            drifted_count = drifted.count()
+
+            if not options['dry_run'] and drifted_count:
+                Post.objects.filter(pk__in=drifted).update(
+                    likes_count=count_of(Like),
+                    comments_count=count_of(Comment),
+                )
+
+        action = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(f'{action} {drifted_count} drifted post(s)')
@@ -0,0 +1,91 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+SQLITE_FTS_SQL = [
+    """
+    CREATE VIRTUAL TABLE posts_post_fts USING fts5(
+        search_document, content='posts_post', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER posts_post_fts_insert AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, search_document)
+        VALUES (new.id, new.search_document);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_post_fts_delete AFTER DELETE ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, search_document)
+        VALUES ('delete', old.id, old.search_document);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_post_fts_update
+    AFTER UPDATE OF search_document ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, search_document)
+        VALUES ('delete', old.id, old.search_document);
+        INSERT INTO posts_post_fts(rowid, search_document)
+        VALUES (new.id, new.search_document);
+    END
+    """,
+]
+
+SQLITE_DROP_FTS_SQL = [
+    'DROP TRIGGER IF EXISTS posts_post_fts_update',
+    'DROP TRIGGER IF EXISTS posts_post_fts_delete',
+    'DROP TRIGGER IF EXISTS posts_post_fts_insert',
+    'DROP TABLE IF EXISTS posts_post_fts',
+]
+
+
+def search_index(model):
+    from django.contrib.postgres.indexes import GinIndex
+    from django.contrib.postgres.search import SearchVector
+    return GinIndex(
+        SearchVector('search_document', config='english'),
+        name='post_search_document_gin',
+    )
+
+
+def create_search_index(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.add_index(Post, search_index(Post))
+    elif vendor == 'sqlite':
+        for statement in SQLITE_FTS_SQL:
+            schema_editor.execute(statement)
+
+    for post in Post.objects.select_related('owner').iterator():
+        tag_names = post.tags.values_list('name', flat=True)
+        post.search_document = ' '.join(
+            [post.title, post.content, *tag_names, post.owner.username]
+        )
+        post.save(update_fields=['search_document'])
+
+
+def drop_search_index(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.remove_index(Post, search_index(Post))
+    elif vendor == 'sqlite':
+        for statement in SQLITE_DROP_FTS_SQL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_likes_count_post_comments_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+
+def populate_tag_usage(apps, schema_editor):
+    Tag = apps.get_model('posts', 'Tag')
+    TagUsage = apps.get_model('posts', 'TagUsage')
+    PostTag = apps.get_model('posts', 'Post_tags')
+
+    window_start = timezone.now().date() - timedelta(
+        days=settings.TAG_TRENDING_WINDOW_DAYS - 1
+    )
+    buckets = PostTag.objects.filter(
+        post__created_at__date__gte=window_start
+    ).annotate(
+        day=TruncDate('post__created_at')
+    ).order_by().values('tag_id', 'day').annotate(total=Count('pk'))
+    TagUsage.objects.bulk_create([
+        TagUsage(tag_id=bucket['tag_id'], day=bucket['day'],
+                 count=bucket['total'])
+        for bucket in buckets
+    ])
+
+    in_window = TagUsage.objects.filter(
+        tag=OuterRef('pk')
+    ).order_by().values('tag').annotate(total=Sum('count'))
+    tagged_posts = PostTag.objects.filter(
+        tag=OuterRef('pk')
+    ).order_by().values('tag').annotate(total=Count('pk'))
+    Tag.objects.update(
+        trending_score=Coalesce(Subquery(in_window.values('total')), 0),
+        usage_count=Coalesce(Subquery(tagged_posts.values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='trending_score',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='usage_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='TagUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_usage', to='posts.tag')),
+            ],
+            options={
+                'ordering': ['-day'],
+                'unique_together': {('tag', 'day')},
+            },
+        ),
+        migrations.RunPython(populate_tag_usage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:37
+
+import drf_api.images
+from django.db import migrations, models
+
+# Adding columns rebuilds posts_post on SQLite, dropping the full-text
+# search triggers created in 0015_post_search_document
+SQLITE_FTS_TRIGGERS_SQL = [
+    'DROP TRIGGER IF EXISTS posts_post_fts_insert',
+    'DROP TRIGGER IF EXISTS posts_post_fts_delete',
+    'DROP TRIGGER IF EXISTS posts_post_fts_update',
+    """
+    CREATE TRIGGER posts_post_fts_insert AFTER INSERT ON posts_post BEGIN
+        INSERT INTO posts_post_fts(rowid, search_document)
+        VALUES (new.id, new.search_document);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_post_fts_delete AFTER DELETE ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, search_document)
+        VALUES ('delete', old.id, old.search_document);
+    END
+    """,
+    """
+    CREATE TRIGGER posts_post_fts_update
+    AFTER UPDATE OF search_document ON posts_post BEGIN
+        INSERT INTO posts_post_fts(posts_post_fts, rowid, search_document)
+        VALUES ('delete', old.id, old.search_document);
+        INSERT INTO posts_post_fts(rowid, search_document)
+        VALUES (new.id, new.search_document);
+    END
+    """,
+]
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in SQLITE_FTS_TRIGGERS_SQL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='ready', editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='staged_image',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, default='green-apple_iubz3m', null=True, storage=drf_api.images.image_storage, upload_to='posts/'),
+        ),
+        migrations.RunPython(
+            restore_search_triggers, migrations.RunPython.noop
+        ),
+    ]
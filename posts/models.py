@@ -1,25 +1,105 @@
 from django.db import models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.contrib.auth.models import User
-from cloudinary_storage.storage import MediaCloudinaryStorage
-from django.contrib.auth.models import User
+from profiles.models import Profile
+from drf_api.images import (
+    IMAGE_STATUS_CHOICES, READY, PipelineImageModelMixin, image_storage
+)
+from drf_api.utils import adjust_counter, exclude_from_save
 
 
 class Tag(models.Model):
     """
     Tag model to categorize posts into sustainability-related topics.
+    usage_count is the number of posts carrying the tag and trending_score
+    the number of times it was used within the trending window, both
+    maintained incrementally, see posts.trending.
     """
     name = models.CharField(max_length=50, unique=True)
     description = models.TextField(blank=True)
+    usage_count = models.PositiveIntegerField(default=0, editable=False)
+    trending_score = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
 
 
-class Post(models.Model):
+class TagUsage(models.Model):
+    """
+    Daily usage bucket of a tag, the rolling aggregate behind
+    Tag.trending_score. Buckets older than the trending window are
+    removed by the compact_tag_usage command.
+    """
+    tag = models.ForeignKey(
+        Tag, related_name='daily_usage', on_delete=models.CASCADE
+    )
+    day = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-day']
+        unique_together = ['tag', 'day']
+
+    def __str__(self):
+        return f'{self.tag} {self.day}: {self.count}'
+
+
+class PostQuerySet(models.QuerySet):
+    """
+    QuerySet for posts with helpers for resolving per-viewer state
+    in the same query as the posts themselves.
+    for_feed is the shared builder for every endpoint that renders posts
+    through PostSerializer.
+    """
+
+    def with_viewer_state(self, user):
+        """
+        Annotates each post with the id of the viewer's like (like_id),
+        resolved with a correlated subquery instead of one query per post.
+        """
+        from likes.models import Like
+        if not user.is_authenticated:
+            return self.annotate(
+                like_id=Value(None, output_field=models.BigIntegerField())
+            )
+        likes = Like.objects.filter(owner=user, post=OuterRef('pk'))
+        return self.annotate(like_id=Subquery(likes.values('id')[:1]))
+
+    def for_feed(self, user, fields=None):
+        """
+        Loads everything PostSerializer renders in a fixed number of
+        queries: owners and profiles are joined, tags are prefetched in
+        bulk and the viewer's like_id is annotated. Counts are stored
+        on the post itself.
+        fields limits this to what the given PostSerializer fields need,
+        see drf_api.fieldsets.
+        """
+        def wanted(*names):
+            return fields is None or not fields.isdisjoint(names)
+
+        queryset = self.defer('search_document')
+        if wanted('profile_id', 'profile_image', 'profile_image_srcset'):
+            queryset = queryset.select_related('owner__profile')
+        elif wanted('owner'):
+            queryset = queryset.select_related('owner')
+        if wanted('tags'):
+            queryset = queryset.prefetch_related('tags')
+        if wanted('like_id'):
+            queryset = queryset.with_viewer_state(user)
+        return queryset
+
+
+class Post(PipelineImageModelMixin, models.Model):
     """
     Post model for user-generated content.
     Includes tags for categorization, a shareable URL,
     and an image (with default).
+    likes_count and comments_count are denormalized counters kept in sync
+    by the likes and comments apps, see sync_post_counters to repair them.
+    search_document holds the text indexed for full-text search,
+    see posts.search.
+    Uploaded images are processed in the background, see drf_api.images.
     """
     title = models.CharField(max_length=255)
     content = models.TextField(blank=True)
@@ -30,9 +110,67 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True, null=True,
         default='green-apple_iubz3m',
-        storage=MediaCloudinaryStorage())
+        storage=image_storage)
+    image_status = models.CharField(
+        max_length=10, choices=IMAGE_STATUS_CHOICES, default=READY,
+        editable=False,
+    )
+    staged_image = models.CharField(
+        max_length=255, blank=True, editable=False
+    )
+    image_variants = models.JSONField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    search_document = models.TextField(blank=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
+
+    # Maintained with adjust_counter only, never by saving the post
+    counter_fields = ('likes_count', 'comments_count')
+
+    class Meta:
+        indexes = [
+            # Newest first listings, including cursor pages
+            models.Index(
+                fields=['-created_at', '-id'], name='post_created_idx'
+            ),
+            # A user's posts, newest first, and feed backfills
+            models.Index(
+                fields=['owner', '-created_at'], name='post_owner_created_idx'
+            ),
+            models.Index(fields=['-likes_count'], name='post_likes_count_idx'),
+        ]
+
+    def build_search_document(self):
+        """
+        Returns the searchable text of the post: title, content,
+        tag names and the owner's username.
+        """
+        tag_names = [tag.name for tag in self.tags.all()] if self.pk else []
+        return ' '.join(
+            [self.title, self.content, *tag_names, self.owner.username]
+        )
+
+    def refresh_search_document(self):
+        """
+        Rebuilds and stores the search document, e.g. after tags change.
+        """
+        self.search_document = self.build_search_document()
+        Post.objects.filter(pk=self.pk).update(
+            search_document=self.search_document
+        )
+
+    def save(self, *args, **kwargs):
+        self.search_document = self.build_search_document()
+        exclude_from_save(
+            self, kwargs, (*self.counter_fields, *self.pipeline_fields())
+        )
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'search_document'}
+        super().save(*args, **kwargs)
 
     def generate_shareable_url(self):
         """
@@ -45,3 +183,37 @@ class Post(models.Model):
 
     def __str__(self):
         return self.title
+
+
+def increment_posts_count(sender, instance, created, **kwargs):
+    if created:
+        adjust_counter(
+            Profile.objects.filter(owner_id=instance.owner_id),
+            'posts_count', 1
+        )
+
+
+def decrement_posts_count(sender, instance, **kwargs):
+    adjust_counter(
+        Profile.objects.filter(owner_id=instance.owner_id), 'posts_count', -1
+    )
+
+
+def release_deleted_post_tags(sender, instance, **kwargs):
+    """
+    Releases the tags of a deleted post, before its tag links are
+    removed along with it
+    """
+    from posts.trending import release_tag_usage
+    tag_ids = list(
+        Post.tags.through.objects.filter(
+            post=instance
+        ).values_list('tag_id', flat=True)
+    )
+    if tag_ids:
+        release_tag_usage(tag_ids)
+
+
+post_save.connect(increment_posts_count, sender=Post)
+post_delete.connect(decrement_posts_count, sender=Post)
+pre_delete.connect(release_deleted_post_tags, sender=Post)
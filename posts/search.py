@@ -0,0 +1,94 @@
+"""
+Full-text search over posts.
+
+Each post stores a search document (title, content, tag names and owner
+username, see Post.build_search_document). On PostgreSQL it is matched
+with to_tsvector/to_tsquery backed by a GIN expression index and ranked
+with ts_rank. On SQLite it is matched against an FTS5 table kept in sync
+by triggers and ranked with bm25. Other databases fall back to icontains.
+Every search term is matched as a prefix.
+"""
+import re
+from django.db import connections
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+SQLITE_MATCH_SQL = (
+    'SELECT rowid FROM posts_post_fts WHERE posts_post_fts MATCH %s'
+)
+SQLITE_RANK_SQL = (
+    'SELECT -bm25(posts_post_fts) FROM posts_post_fts '
+    'WHERE posts_post_fts MATCH %s AND rowid = posts_post.id'
+)
+
+
+def search_terms(text):
+    """
+    Splits user input into plain word terms, dropping query syntax
+    """
+    return re.findall(r'\w+', text.lower())
+
+
+def postgres_search(queryset, terms):
+    from django.contrib.postgres.search import (
+        SearchQuery, SearchRank, SearchVector
+    )
+    vector = SearchVector('search_document', config='english')
+    query = SearchQuery(
+        ' & '.join(f'{term}:*' for term in terms),
+        config='english',
+        search_type='raw',
+    )
+    return queryset.alias(search=vector).filter(search=query).annotate(
+        search_rank=SearchRank(vector, query)
+    )
+
+
+def sqlite_search(queryset, terms):
+    query = ' '.join(f'"{term}"*' for term in terms)
+    return queryset.filter(
+        pk__in=RawSQL(SQLITE_MATCH_SQL, [query])
+    ).annotate(
+        search_rank=RawSQL(SQLITE_RANK_SQL, [query])
+    )
+
+
+def fallback_search(queryset, terms):
+    for term in terms:
+        queryset = queryset.filter(search_document__icontains=term)
+    return queryset.annotate(
+        search_rank=Value(0.0, output_field=FloatField())
+    )
+
+
+def search_posts(queryset, text):
+    """
+    Filters queryset to the posts matching text and annotates search_rank,
+    higher being more relevant
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        return postgres_search(queryset, terms)
+    if vendor == 'sqlite':
+        return sqlite_search(queryset, terms)
+    return fallback_search(queryset, terms)
+
+
+class PostSearchFilter(filters.SearchFilter):
+    """
+    ?search= filter backed by the full-text search index.
+    Results are ordered by relevance unless ?ordering= is given.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '')
+        if not search_terms(text):
+            return queryset
+        queryset = search_posts(queryset, text)
+        if not request.query_params.get('ordering'):
+            queryset = queryset.order_by('-search_rank', '-created_at')
+        return queryset
@@ -1,21 +1,36 @@
 from rest_framework import serializers
+from drf_api.fieldsets import SparseFieldsMixin
+from drf_api.images import (
+    DeferredImageMixin, ImageSrcsetField, ImageURLField
+)
 from posts.models import Post, Tag
 from likes.models import Like
+from feed.utils import fan_out_post
+from posts.trending import record_tag_usage, release_tag_usage
 import re
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(
+    SparseFieldsMixin, DeferredImageMixin, serializers.ModelSerializer
+):
     """
     Serializer for the Post model.
     Includes validation for images and dynamic user-generated hashtags.
+    Supports sparse fieldsets, see drf_api.fieldsets. Uploaded images
+    are stored in the background, see drf_api.images.
     """
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
     profile_id = serializers.ReadOnlyField(source='owner.profile.id')
-    profile_image = serializers.ReadOnlyField(source='owner.profile.image.url')
+    profile_image = ImageURLField(source='owner.profile.image')
+    profile_image_srcset = ImageSrcsetField(
+        source='owner.profile.image_variants'
+    )
     like_id = serializers.SerializerMethodField()
     likes_count = serializers.ReadOnlyField()
     comments_count = serializers.ReadOnlyField()
+    image_srcset = ImageSrcsetField(source='image_variants')
+    image_status = serializers.ReadOnlyField()
 
     # Renamed field with help text
     add_hashtags = serializers.CharField(
@@ -84,16 +99,71 @@ class PostSerializer(serializers.ModelSerializer):
         tag_names = self.extract_hashtags(tags_input)
 
         post = Post.objects.create(**validated_data)
+        self.save_tags(post, tag_names)
+        post.refresh_search_document()
 
-        # Create or get tags and associate them with the post
-        for tag_name in tag_names:
-            # Remove the # symbol when storing in database
-            clean_tag_name = tag_name.lstrip('#')
-            tag, created = Tag.objects.get_or_create(name=clean_tag_name)
-            post.tags.add(tag)
+        fan_out_post(post)
+        return post
 
+    def update(self, instance, validated_data):
+        """
+        Replaces the post's tags when add_hashtags is sent,
+        leaving them untouched otherwise
+        """
+        tags_input = validated_data.pop('add_hashtags', None)
+        post = super().update(instance, validated_data)
+        if tags_input is not None:
+            self.save_tags(
+                post, self.extract_hashtags(tags_input), replace=True
+            )
+            post.refresh_search_document()
         return post
 
+    def save_tags(self, post, tag_names, replace=False):
+        """
+        Create or get tags and associate them with the post in a constant
+        number of queries, however many hashtags are given.
+        With replace, tags that are no longer listed are detached.
+        Tag usage statistics are updated for attached and detached tags.
+        """
+        # Remove the # symbol when storing in database
+        names = list(dict.fromkeys(name.lstrip('#') for name in tag_names))
+        PostTag = Post.tags.through
+        # Tags loaded with prefetch_related are stale from here on
+        getattr(post, '_prefetched_objects_cache', {}).pop('tags', None)
+
+        current_ids = set()
+        if replace:
+            current_ids = set(
+                PostTag.objects.filter(
+                    post=post
+                ).values_list('tag_id', flat=True)
+            )
+
+        tag_ids = set()
+        if names:
+            Tag.objects.bulk_create(
+                [Tag(name=name) for name in names], ignore_conflicts=True
+            )
+            tag_ids = set(
+                Tag.objects.filter(
+                    name__in=names
+                ).values_list('id', flat=True)
+            )
+
+        removed_ids = current_ids - tag_ids
+        if removed_ids:
+            PostTag.objects.filter(post=post, tag_id__in=removed_ids).delete()
+            release_tag_usage(removed_ids)
+
+        added_ids = tag_ids - current_ids
+        if added_ids:
+            PostTag.objects.bulk_create(
+                [PostTag(post=post, tag_id=tag_id) for tag_id in added_ids],
+                ignore_conflicts=True,
+            )
+            record_tag_usage(added_ids)
+
     def extract_hashtags(self, tags):
         if tags:
             return [
@@ -105,9 +175,15 @@ class PostSerializer(serializers.ModelSerializer):
 
     def get_is_owner(self, obj):
         request = self.context['request']
-        return request.user == obj.owner
+        return request.user.pk == obj.owner_id
 
     def get_like_id(self, obj):
+        """
+        Use the like_id annotated by PostQuerySet.with_viewer_state when
+        available, only querying for posts that were not annotated.
+        """
+        if hasattr(obj, 'like_id'):
+            return obj.like_id
         user = self.context['request'].user
         if user.is_authenticated:
             like = Like.objects.filter(owner=user, post=obj).first()
@@ -124,8 +200,25 @@ class PostSerializer(serializers.ModelSerializer):
         model = Post
         fields = [
             'id', 'owner', 'is_owner', 'profile_id',
-            'profile_image', 'title', 'content', 'image',
+            'profile_image', 'profile_image_srcset', 'title', 'content',
+            'image', 'image_srcset', 'image_status',
             'created_at', 'updated_at', 'like_id',
             'likes_count', 'comments_count',
             'add_hashtags', 'tags',
         ]
+
+
+class TagSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the Tag model with its usage statistics
+    """
+    name = serializers.SerializerMethodField()
+
+    def get_name(self, obj):
+        return f"#{obj.name}"
+
+    class Meta:
+        model = Tag
+        fields = [
+            'id', 'name', 'description', 'usage_count', 'trending_score',
+        ]
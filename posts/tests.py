@@ -1,3 +1,565 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+from comments.models import Comment
+from drf_api.images import process_image, submit_image
+from likes.models import Like
+from .models import Post, Tag, TagUsage
 
-# Create your tests here.
+
+class PostViewTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.client.force_authenticate(user=self.user)
+
+    def create_posts(self, count):
+        for index in range(count):
+            post = Post.objects.create(owner=self.user, title=f'post {index}')
+            Like.objects.create(owner=self.user, post=post)
+
+    def count_like_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/posts/', secure=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len([
+            query for query in context.captured_queries
+            if 'likes_like' in query['sql']
+        ])
+
+    def test_like_id_is_resolved_for_the_viewer(self):
+        post = Post.objects.create(owner=self.user, title='a title')
+        like = Like.objects.create(owner=self.user, post=post)
+        response = self.client.get('/posts/', secure=True)
+        self.assertEqual(response.data['results'][0]['like_id'], like.id)
+
+    def test_like_id_is_none_for_anonymous_users(self):
+        post = Post.objects.create(owner=self.user, title='a title')
+        Like.objects.create(owner=self.user, post=post)
+        self.client.force_authenticate(user=None)
+        response = self.client.get('/posts/', secure=True)
+        self.assertIsNone(response.data['results'][0]['like_id'])
+
+    def test_like_queries_do_not_grow_with_page_size(self):
+        self.create_posts(1)
+        single_post_queries = self.count_like_queries()
+        self.create_posts(9)
+        full_page_queries = self.count_like_queries()
+        self.assertEqual(single_post_queries, full_page_queries)
+
+    def test_full_page_loads_in_a_fixed_number_of_queries(self):
+        other = User.objects.create_user(username='brian', password='pass')
+        tag = Tag.objects.create(name='nature')
+        for index in range(10):
+            owner = self.user if index % 2 else other
+            post = Post.objects.create(owner=owner, title=f'post {index}')
+            post.tags.add(tag)
+        # page count, posts with owners/profiles/counts/like_id, tags
+        with self.assertNumQueries(3):
+            response = self.client.get('/posts/', secure=True)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(response.data['results'][0]['tags'], ['#nature'])
+
+    def test_post_detail_loads_in_a_fixed_number_of_queries(self):
+        post = Post.objects.create(owner=self.user, title='a title')
+        post.tags.add(Tag.objects.create(name='nature'))
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/posts/{post.id}/', secure=True)
+        self.assertEqual(response.data['profile_id'], self.user.profile.id)
+
+    def test_sparse_fields_render_and_load_only_what_is_asked(self):
+        post = Post.objects.create(owner=self.user, title='a title')
+        post.tags.add(Tag.objects.create(name='nature'))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                '/posts/?fields=id,title', secure=True
+            )
+        self.assertEqual(
+            response.data['results'], [{'id': post.id, 'title': 'a title'}]
+        )
+        sql = ' '.join(query['sql'] for query in context.captured_queries)
+        for table in ('likes_like', 'posts_tag', 'profiles_profile'):
+            self.assertNotIn(table, sql)
+
+    def test_omit_drops_fields(self):
+        Post.objects.create(owner=self.user, title='a title')
+        response = self.client.get(
+            '/posts/?omit=tags,like_id', secure=True
+        )
+        result = response.data['results'][0]
+        self.assertNotIn('tags', result)
+        self.assertNotIn('like_id', result)
+        self.assertEqual(result['title'], 'a title')
+
+
+class PostTagTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.client.force_authenticate(user=self.user)
+
+    def create_post(self, hashtags):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                '/posts/',
+                {'title': 'a title', 'add_hashtags': hashtags},
+                secure=True,
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response, len(context.captured_queries)
+
+    def test_tags_are_created_in_constant_queries(self):
+        Tag.objects.create(name='nature')
+        _, one_tag = self.create_post('nature')
+        response, many_tags = self.create_post(
+            'nature, travel, food, solar, wind, nature'
+        )
+        self.assertEqual(one_tag, many_tags)
+        self.assertEqual(
+            response.data['tags'],
+            ['#nature', '#travel', '#food', '#solar', '#wind'],
+        )
+        self.assertEqual(Tag.objects.count(), 5)
+
+    def test_update_replaces_tags(self):
+        response, _ = self.create_post('nature, travel')
+        url = f"/posts/{response.data['id']}/"
+        response = self.client.patch(
+            url, {'add_hashtags': 'travel, food'}, secure=True
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data['tags']), ['#food', '#travel'])
+
+    def test_update_without_hashtags_keeps_tags(self):
+        response, _ = self.create_post('nature')
+        url = f"/posts/{response.data['id']}/"
+        response = self.client.patch(url, {'title': 'new'}, secure=True)
+        self.assertEqual(response.data['tags'], ['#nature'])
+
+
+class PostSearchTests(APITestCase):
+    def setUp(self):
+        self.adam = User.objects.create_user(username='adam', password='pass')
+        self.brian = User.objects.create_user(username='brian', password='x')
+        self.client.force_authenticate(user=self.adam)
+
+    def search(self, text):
+        response = self.client.get('/posts/', {'search': text}, secure=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [post['title'] for post in response.data['results']]
+
+    def test_search_matches_title_content_tags_and_owner(self):
+        Post.objects.create(owner=self.adam, title='Solar panels')
+        Post.objects.create(
+            owner=self.adam, title='Garden', content='Composting tips'
+        )
+        Post.objects.create(owner=self.brian, title='Cycling')
+        self.client.post(
+            '/posts/', {'title': 'Hiking', 'add_hashtags': 'nature, trails'},
+            secure=True,
+        )
+        self.assertEqual(self.search('solar'), ['Solar panels'])
+        self.assertEqual(self.search('compost'), ['Garden'])
+        self.assertEqual(self.search('trails'), ['Hiking'])
+        self.assertEqual(self.search('brian'), ['Cycling'])
+
+    def test_tagged_posts_are_not_duplicated(self):
+        self.client.post(
+            '/posts/',
+            {'title': 'Green energy', 'add_hashtags': 'green, greenery'},
+            secure=True,
+        )
+        self.assertEqual(self.search('green'), ['Green energy'])
+
+    def test_search_document_follows_edits(self):
+        response = self.client.post(
+            '/posts/', {'title': 'Old title'}, secure=True
+        )
+        self.client.patch(
+            f"/posts/{response.data['id']}/",
+            {'title': 'New title', 'add_hashtags': 'renamed'},
+            secure=True,
+        )
+        self.assertEqual(self.search('old'), [])
+        self.assertEqual(self.search('renamed'), ['New title'])
+
+    def test_results_are_ranked_by_relevance(self):
+        Post.objects.create(owner=self.adam, title='Water', content='bees')
+        Post.objects.create(
+            owner=self.adam, title='Bees', content='bees bees bees'
+        )
+        self.assertEqual(self.search('bees'), ['Bees', 'Water'])
+
+
+class TagTrendingTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.client.force_authenticate(user=self.user)
+
+    def create_post(self, hashtags):
+        return self.client.post(
+            '/posts/', {'title': 'a title', 'add_hashtags': hashtags},
+            secure=True,
+        )
+
+    def test_tag_list_reports_usage_and_trending_order(self):
+        self.create_post('nature, solar')
+        self.create_post('solar')
+        response = self.client.get('/tags/', secure=True)
+        tags = [
+            (tag['name'], tag['usage_count'], tag['trending_score'])
+            for tag in response.data['results']
+        ]
+        self.assertEqual(tags, [('#solar', 2, 2), ('#nature', 1, 1)])
+
+    def test_detaching_tags_lowers_usage_count(self):
+        response = self.create_post('nature, solar')
+        self.client.patch(
+            f"/posts/{response.data['id']}/", {'add_hashtags': 'solar'},
+            secure=True,
+        )
+        self.assertEqual(Tag.objects.get(name='nature').usage_count, 0)
+        self.assertEqual(Tag.objects.get(name='solar').usage_count, 1)
+
+    def test_deleting_a_post_lowers_usage_count(self):
+        self.create_post('solar')
+        response = self.create_post('nature, solar')
+        self.client.delete(f"/posts/{response.data['id']}/", secure=True)
+        self.assertEqual(Tag.objects.get(name='nature').usage_count, 0)
+        self.assertEqual(Tag.objects.get(name='solar').usage_count, 1)
+
+    def test_compaction_rolls_the_window_over(self):
+        self.create_post('nature')
+        tag = Tag.objects.get(name='nature')
+        TagUsage.objects.create(
+            tag=tag, day=timezone.now().date() - timedelta(days=30), count=5
+        )
+        Tag.objects.update(trending_score=6)
+        out = StringIO()
+        call_command('compact_tag_usage', stdout=out)
+        self.assertIn('Removed 1 expired', out.getvalue())
+        tag.refresh_from_db()
+        self.assertEqual(tag.trending_score, 1)
+        self.assertEqual(tag.usage_count, 1)
+
+
+class PostCursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        for index in range(15):
+            Post.objects.create(owner=self.user, title=f'post {index}')
+
+    def test_cursor_pages_walk_every_post_once(self):
+        seen = []
+        url = '/posts/?pagination=cursor'
+        while url:
+            response = self.client.get(url, secure=True)
+            self.assertNotIn('count', response.data)
+            seen += [post['id'] for post in response.data['results']]
+            url = response.data['next']
+        expected = Post.objects.order_by('-created_at', '-id')
+        self.assertEqual(seen, list(expected.values_list('id', flat=True)))
+
+    def test_cursor_pages_skip_the_count_query(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/posts/?pagination=cursor', secure=True)
+        self.assertFalse([
+            query for query in context.captured_queries
+            if 'COUNT(' in query['sql']
+        ])
+
+    def test_page_number_pagination_is_the_default(self):
+        response = self.client.get('/posts/', secure=True)
+        self.assertEqual(response.data['count'], 15)
+
+
+class PostResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.post = Post.objects.create(owner=self.user, title='a title')
+
+    def test_anonymous_reads_are_served_from_the_cache(self):
+        first = self.client.get('/posts/', secure=True)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get('/posts/', secure=True)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+
+    def test_query_parameter_order_does_not_matter(self):
+        self.client.get('/posts/?ordering=likes_count&page=1', secure=True)
+        response = self.client.get(
+            '/posts/?page=1&ordering=likes_count', secure=True
+        )
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_writes_invalidate_cached_responses(self):
+        self.client.get(f'/posts/{self.post.id}/', secure=True)
+        Like.objects.create(owner=self.user, post=self.post)
+        response = self.client.get(f'/posts/{self.post.id}/', secure=True)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['likes_count'], 1)
+
+    def test_authenticated_reads_bypass_the_cache(self):
+        self.client.get('/posts/', secure=True)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/posts/', secure=True)
+        self.assertFalse(response.has_header('X-Cache'))
+
+
+class PostConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.post = Post.objects.create(owner=self.user, title='a title')
+        self.url = f'/posts/{self.post.id}/'
+        self.client.force_authenticate(user=self.user)
+
+    def test_matching_etag_short_circuits_with_one_query(self):
+        etag = self.client.get(self.url, secure=True)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                self.url, secure=True, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_when_the_post_is_liked(self):
+        etag = self.client.get(self.url, secure=True)['ETag']
+        Like.objects.create(owner=self.user, post=self.post)
+        response = self.client.get(
+            self.url, secure=True, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_changes_when_the_post_is_liked_again(self):
+        Like.objects.create(owner=self.user, post=self.post)
+        etag = self.client.get(self.url, secure=True)['ETag']
+        Like.objects.get().delete()
+        like = Like.objects.create(owner=self.user, post=self.post)
+        response = self.client.get(
+            self.url, secure=True, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['like_id'], like.id)
+
+    def test_cached_anonymous_responses_honour_if_none_match(self):
+        self.client.force_authenticate(user=None)
+        etag = self.client.get(self.url, secure=True)['ETag']
+        response = self.client.get(
+            self.url, secure=True, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_list_sets_last_modified_from_the_newest_row(self):
+        response = self.client.get('/posts/', secure=True)
+        self.assertTrue(response.has_header('Last-Modified'))
+
+
+class PostCounterSaveTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.post = Post.objects.create(owner=self.user, title='a title')
+
+    def test_editing_a_post_keeps_concurrent_likes(self):
+        post = Post.objects.get(pk=self.post.pk)
+        # Liked after the post was loaded for the edit
+        Like.objects.create(owner=self.user, post=self.post)
+        post.title = 'new title'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.title, 'new title')
+        self.assertEqual(post.likes_count, 1)
+
+    def test_new_posts_are_inserted(self):
+        post = Post(owner=self.user, title='another')
+        post.save()
+        self.assertEqual(Post.objects.filter(pk=post.pk).count(), 1)
+
+
+class SyncPostCountersCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.post = Post.objects.create(owner=self.user, title='a title')
+        Like.objects.create(owner=self.user, post=self.post)
+        Comment.objects.create(owner=self.user, post=self.post, content='hi')
+        Post.objects.update(likes_count=7, comments_count=0)
+
+    def test_dry_run_reports_without_repairing(self):
+        out = StringIO()
+        call_command('sync_post_counters', '--dry-run', stdout=out)
+        self.assertIn('Found 1 drifted post(s)', out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 7)
+
+    def test_drifted_counters_are_repaired(self):
+        out = StringIO()
+        call_command('sync_post_counters', stdout=out)
+        self.assertIn('Repaired 1 drifted post(s)', out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.likes_count, 1)
+        self.assertEqual(self.post.comments_count, 1)
+
+
+def image_upload(name='photo.jpg', size=(300, 200)):
+    output = BytesIO()
+    Image.new('RGB', size, 'green').save(output, format='JPEG')
+    return SimpleUploadedFile(name, output.getvalue(), 'image/jpeg')
+
+
+class PostImagePipelineTests(APITestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        override = override_settings(
+            STORAGES={
+                'default': {
+                    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                },
+                'images': {
+                    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                    'OPTIONS': {'location': f'{root}/images'},
+                },
+                'staging': {
+                    'BACKEND': 'django.core.files.storage.FileSystemStorage',
+                    'OPTIONS': {'location': f'{root}/staging'},
+                },
+            },
+            IMAGE_PIPELINE_BACKEND='drf_api.images.InProcessBackend',
+            IMAGE_MAX_DIMENSION=150,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.client.force_authenticate(user=self.user)
+
+    def test_uploaded_image_is_processed_after_the_response(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/posts/',
+                {'title': 'a title', 'image': image_upload()},
+                format='multipart', secure=True,
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data['image_status'], 'pending')
+        post = Post.objects.get()
+        self.assertEqual(post.image_status, 'ready')
+        self.assertEqual(post.staged_image, '')
+        self.assertTrue(post.image.name.startswith('posts/'))
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (150, 100))
+        self.assertEqual(storages['staging'].listdir('posts.post')[1], [])
+
+    def test_renditions_are_rendered_as_srcsets(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                '/posts/',
+                {'title': 'a title', 'image': image_upload()},
+                format='multipart', secure=True,
+            )
+        post = Post.objects.get()
+        # full and avatar sizes, feed is larger than the image itself
+        self.assertEqual(
+            [(variant['size'], variant['type'], variant['width'])
+             for variant in post.image_variants],
+            [
+                ('full', 'image/jpeg', 150), ('full', 'image/webp', 150),
+                ('avatar', 'image/jpeg', 128), ('avatar', 'image/webp', 128),
+            ],
+        )
+        response = self.client.get(f'/posts/{post.id}/', secure=True)
+        self.assertEqual(
+            response.data['image_srcset']['image/webp'],
+            '/posts/photo_avatar.webp 128w, /posts/photo_full.webp 150w',
+        )
+        self.assertIsNone(response.data['profile_image_srcset'])
+
+    def test_superseded_upload_is_discarded(self):
+        post = Post.objects.create(owner=self.user, title='a title')
+        with self.captureOnCommitCallbacks():
+            submit_image(post, image_upload('first.jpg'))
+            first = post.staged_image
+            submit_image(post, image_upload('second.jpg'))
+        process_image('posts.Post', post.pk, first)
+        post.refresh_from_db()
+        self.assertEqual(post.image_status, 'pending')
+        self.assertEqual(post.image.name, 'green-apple_iubz3m')
+        self.assertEqual(storages['images'].listdir('posts')[1], [])
+        process_image('posts.Post', post.pk, post.staged_image)
+        post.refresh_from_db()
+        self.assertEqual(post.image_status, 'ready')
+        self.assertEqual(post.image.name, 'posts/second.jpg')
+
+    def test_editing_a_post_keeps_the_pipeline_state(self):
+        post = Post.objects.create(owner=self.user, title='a title')
+        with self.captureOnCommitCallbacks():
+            submit_image(
+                Post.objects.get(pk=post.pk), image_upload('photo.jpg')
+            )
+        # Loaded while the image was still pending
+        stale = Post.objects.get(pk=post.pk)
+        process_image('posts.Post', post.pk, stale.staged_image)
+        stale.title = 'new title'
+        stale.save()
+        post.refresh_from_db()
+        self.assertEqual(post.image_status, 'ready')
+        self.assertEqual(post.staged_image, '')
+        self.assertEqual(post.image.name, 'posts/photo.jpg')
+        self.assertEqual(post.image_variants[0]['name'], post.image.name)
+
+    def test_saving_a_changed_image_stores_it(self):
+        post = Post.objects.create(owner=self.user, title='a title')
+        post = Post.objects.get(pk=post.pk)
+        post.image = 'posts/replaced.jpg'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, 'posts/replaced.jpg')
+
+    def test_unreadable_image_is_marked_failed(self):
+        post = Post.objects.create(owner=self.user, title='a title')
+        staged = storages['staging'].save(
+            'posts.post/broken.jpg', ContentFile(b'not an image')
+        )
+        Post.objects.filter(pk=post.pk).update(
+            image_status='pending', staged_image=staged
+        )
+        with self.assertLogs('drf_api.images', 'ERROR'):
+            process_image('posts.Post', post.pk, staged)
+        post.refresh_from_db()
+        self.assertEqual(post.image_status, 'failed')
+        self.assertEqual(post.image.name, 'green-apple_iubz3m')
+        self.assertFalse(storages['staging'].exists(staged))
+
+    def test_etag_changes_when_processing_fails(self):
+        post = Post.objects.create(owner=self.user, title='a title')
+        staged = storages['staging'].save(
+            'posts.post/broken.jpg', ContentFile(b'not an image')
+        )
+        Post.objects.filter(pk=post.pk).update(
+            image_status='pending', staged_image=staged
+        )
+        response = self.client.get(f'/posts/{post.id}/', secure=True)
+        self.assertEqual(response.data['image_status'], 'pending')
+        with self.assertLogs('drf_api.images', 'ERROR'):
+            process_image('posts.Post', post.pk, staged)
+        response = self.client.get(
+            f'/posts/{post.id}/', secure=True,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['image_status'], 'failed')
@@ -0,0 +1,69 @@
+"""
+Incrementally maintained tag usage statistics.
+
+Attaching tags to a post bumps Tag.usage_count, Tag.trending_score and
+the tag's TagUsage bucket for today in a fixed number of queries.
+Detaching tags, or deleting their post, lowers Tag.usage_count.
+compact_tag_usage rolls the window over: it drops buckets older than
+TAG_TRENDING_WINDOW_DAYS, recomputes trending scores from the remaining
+buckets and repairs usage counts.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from drf_api.utils import adjust_counter
+from posts.models import Post, Tag, TagUsage
+
+
+def record_tag_usage(tag_ids):
+    """
+    Counts one new use of every tag in tag_ids
+    """
+    today = timezone.now().date()
+    with transaction.atomic():
+        TagUsage.objects.bulk_create(
+            [TagUsage(tag_id=tag_id, day=today) for tag_id in tag_ids],
+            ignore_conflicts=True,
+        )
+        adjust_counter(
+            TagUsage.objects.filter(tag_id__in=tag_ids, day=today),
+            'count', 1
+        )
+        Tag.objects.filter(pk__in=tag_ids).update(
+            usage_count=F('usage_count') + 1,
+            trending_score=F('trending_score') + 1,
+        )
+
+
+def release_tag_usage(tag_ids):
+    """
+    Counts tags in tag_ids as detached from one post
+    """
+    adjust_counter(Tag.objects.filter(pk__in=tag_ids), 'usage_count', -1)
+
+
+def compact_tag_usage():
+    """
+    Rolls the trending window over and repairs usage counts.
+    Returns the number of expired buckets removed.
+    """
+    window_start = timezone.now().date() - timedelta(
+        days=settings.TAG_TRENDING_WINDOW_DAYS - 1
+    )
+    in_window = TagUsage.objects.filter(
+        tag=OuterRef('pk'), day__gte=window_start
+    ).order_by().values('tag').annotate(total=Sum('count'))
+    tagged_posts = Post.tags.through.objects.filter(
+        tag=OuterRef('pk')
+    ).order_by().values('tag').annotate(total=Count('pk'))
+
+    with transaction.atomic():
+        expired, _ = TagUsage.objects.filter(day__lt=window_start).delete()
+        Tag.objects.update(
+            trending_score=Coalesce(Subquery(in_window.values('total')), 0),
+            usage_count=Coalesce(Subquery(tagged_posts.values('total')), 0),
+        )
+    return expired
@@ -4,4 +4,5 @@ from posts import views
 urlpatterns = [
     path('posts/', views.PostList.as_view(), name='post-list'),
     path('posts/<int:pk>/', views.PostDetail.as_view(), name='post-detail'),
+    path('tags/', views.TagList.as_view(), name='tag-list'),
 ]
@@ -1,25 +1,38 @@
-from django.db.models import Count
 from rest_framework import generics, permissions, filters
 from django_filters.rest_framework import DjangoFilterBackend
+from drf_api.cache import AnonymousResponseCacheMixin
+from drf_api.conditional import (
+    ConditionalRetrieveMixin, LastModifiedListMixin
+)
+from drf_api.fieldsets import selected_fields
 from drf_api.permissions import IsOwnerOrReadOnly
-from .models import Post
-from .serializers import PostSerializer
+from drf_api.pagination import FeedPagination
+from .models import Post, Tag
+from .search import PostSearchFilter
+from .serializers import PostSerializer, TagSerializer
 
+# Models rendered by PostSerializer, see drf_api.cache
+POST_CACHE_MODELS = (
+    'posts.Post', 'likes.Like', 'comments.Comment', 'profiles.Profile',
+    'followers.Follower', 'auth.User',
+)
 
-class PostList(generics.ListCreateAPIView):
+
+class PostList(
+    AnonymousResponseCacheMixin, LastModifiedListMixin,
+    generics.ListCreateAPIView
+):
     """
     List posts or create a post if logged in.
     The perform_create method associates the post with the logged-in user.
     """
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    queryset = Post.objects.annotate(
-        likes_count=Count('likes', distinct=True),
-        comments_count=Count('comment', distinct=True)
-    ).order_by('-created_at')
+    pagination_class = FeedPagination
+    cache_models = POST_CACHE_MODELS
     filter_backends = [
         filters.OrderingFilter,
-        filters.SearchFilter,
+        PostSearchFilter,
         DjangoFilterBackend,
     ]
     filterset_fields = [
@@ -28,17 +41,21 @@ class PostList(generics.ListCreateAPIView):
         'owner__profile',
         'tags__name',  # Allows filtering by hashtags
     ]
-    search_fields = [
-        'owner__username',
-        'title',
-        'tags__name',  # Allows searching by hashtags
-    ]
     ordering_fields = [
         'likes_count',
         'comments_count',
         'likes__created_at',
     ]
 
+    def get_queryset(self):
+        """
+        Loads owners, profiles, tags, counts and the viewer's like_id
+        in bulk, as far as the requested fields need them.
+        """
+        return Post.objects.for_feed(
+            self.request.user, selected_fields(self.request, PostSerializer)
+        ).order_by('-created_at')
+
     def perform_create(self, serializer):
         """
         Associates the post with the currently logged-in user.
@@ -46,13 +63,49 @@ class PostList(generics.ListCreateAPIView):
         serializer.save(owner=self.request.user)
 
 
-class PostDetail(generics.RetrieveUpdateDestroyAPIView):
+class PostDetail(
+    AnonymousResponseCacheMixin, ConditionalRetrieveMixin,
+    generics.RetrieveUpdateDestroyAPIView
+):
     """
     Retrieve a post and edit or delete it if you own it.
     """
     serializer_class = PostSerializer
     permission_classes = [IsOwnerOrReadOnly]
-    queryset = Post.objects.annotate(
-        likes_count=Count('likes', distinct=True),
-        comments_count=Count('comment', distinct=True)
-    ).order_by('-created_at')
+    cache_models = POST_CACHE_MODELS
+    etag_fields = (
+        'updated_at', 'likes_count', 'comments_count',
+        'owner__username', 'owner__profile__updated_at', 'like_id',
+    )
+    etag_field_sources = {
+        'owner__username': ('owner',),
+        'like_id': ('like_id',),
+        'owner__profile__updated_at': (
+            'profile_image', 'profile_image_srcset',
+        ),
+    }
+
+    def get_queryset(self):
+        """
+        Loads owners, profiles, tags, counts and the viewer's like_id
+        in bulk, as far as the requested fields need them.
+        """
+        return Post.objects.for_feed(
+            self.request.user, selected_fields(self.request, PostSerializer)
+        ).order_by('-created_at')
+
+    def get_etag_queryset(self):
+        return Post.objects.with_viewer_state(self.request.user)
+
+
+class TagList(generics.ListAPIView):
+    """
+    List tags with their usage counts, most trending first.
+    Statistics are read from the incrementally maintained counters.
+    """
+    serializer_class = TagSerializer
+    queryset = Tag.objects.filter(
+        usage_count__gt=0
+    ).order_by('-trending_score', '-usage_count', 'name')
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ['trending_score', 'usage_count', 'name']
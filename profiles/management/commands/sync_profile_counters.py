@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from followers.models import Follower
+from posts.models import Post
+from profiles.models import Profile
+
+
+def count_of(model, field):
+    """
+    Correlated subquery counting the rows of model whose field is the
+    profile owner
+    """
+    counts = model.objects.filter(
+        **{field: OuterRef('owner')}
+    ).order_by().values(field).annotate(total=Count('pk'))
+    return Coalesce(Subquery(counts.values('total')), 0)
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the denormalized posts, followers and following counts on
+    profiles and repairs any that have drifted from the real totals
+    """
+    help = 'Recompute and repair profile post and follower counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many profiles have drifted',
+        )
+
+    def handle(self, *args, **options):
+        actual_counts = {
+            'posts_count': count_of(Post, 'owner'),
+            'followers_count': count_of(Follower, 'followed'),
+            'following_count': count_of(Follower, 'owner'),
+        }
+        with transaction.atomic():
+            drifted = Profile.objects.annotate(
+                **{f'actual_{field}': value
+                   for field, value in actual_counts.items()}
+            ).exclude(
+                **{field: F(f'actual_{field}') for field in actual_counts}
+            ).values('pk')
+            drifted_count = drifted.count()
+
+            if not options['dry_run'] and drifted_count:
+                Profile.objects.filter(pk__in=drifted).update(**actual_counts)
+
+        action = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(f'{action} {drifted_count} drifted profile(s)')
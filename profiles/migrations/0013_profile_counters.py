@@ -0,0 +1,51 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:53
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_counters(apps, schema_editor):
+    Profile = apps.get_model('profiles', 'Profile')
+    Post = apps.get_model('posts', 'Post')
+    Follower = apps.get_model('followers', 'Follower')
+
+    def count_of(model, field):
+        counts = model.objects.filter(
+            **{field: OuterRef('owner')}
+        ).order_by().values(field).annotate(total=Count('pk'))
+        return Coalesce(Subquery(counts.values('total')), 0)
+
+    Profile.objects.update(
+        posts_count=count_of(Post, 'owner'),
+        followers_count=count_of(Follower, 'followed'),
+        following_count=count_of(Follower, 'owner'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0012_alter_profile_image'),
+        ('posts', '0014_post_likes_count_post_comments_count'),
+        ('followers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
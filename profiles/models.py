@@ -1,13 +1,60 @@
 from django.db import models
-from django.db.models.signals import post_save
-from cloudinary_storage.storage import MediaCloudinaryStorage
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.models import User
 from django.dispatch import receiver
+from drf_api.cache import invalidate_cached_user
+from drf_api.images import (
+    IMAGE_STATUS_CHOICES, READY, PipelineImageModelMixin, image_storage,
+    image_stored,
+)
+from drf_api.utils import exclude_from_save
 
 # Create your models here.
 
 
-class Profile(models.Model):
+class ProfileQuerySet(models.QuerySet):
+    """
+    QuerySet for profiles with helpers for resolving per-viewer state
+    in the same query as the profiles themselves.
+    """
+
+    def with_viewer_state(self, user):
+        """
+        Annotates each profile with the id of the viewer's follow of its
+        owner (following_id) using a correlated subquery.
+        """
+        from followers.models import Follower
+        if not user.is_authenticated:
+            return self.annotate(
+                following_id=Value(None, output_field=models.BigIntegerField())
+            )
+        follows = Follower.objects.filter(
+            owner=user, followed=OuterRef('owner')
+        )
+        return self.annotate(following_id=Subquery(follows.values('id')[:1]))
+
+    def for_display(self, user, fields=None):
+        """
+        Loads everything ProfileSerializer renders in one query, limited
+        to what the given fields need, see drf_api.fieldsets.
+        """
+        queryset = self
+        if fields is None or 'owner' in fields:
+            queryset = queryset.select_related('owner')
+        if fields is None or 'following_id' in fields:
+            queryset = queryset.with_viewer_state(user)
+        return queryset
+
+
+class Profile(PipelineImageModelMixin, models.Model):
+    """
+    Profile model, created for every new User.
+    posts_count, followers_count and following_count are denormalized
+    counters kept in sync by the posts and followers apps, see
+    sync_profile_counters to repair them.
+    Uploaded images are processed in the background, see drf_api.images.
+    """
     owner = models.OneToOneField(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -17,11 +64,33 @@ class Profile(models.Model):
         upload_to='profiles/',
         blank=True, null=True,
         default='green-apple_iubz3m',
-        storage=MediaCloudinaryStorage())
+        storage=image_storage)
+    image_status = models.CharField(
+        max_length=10, choices=IMAGE_STATUS_CHOICES, default=READY,
+        editable=False,
+    )
+    staged_image = models.CharField(
+        max_length=255, blank=True, editable=False
+    )
+    image_variants = models.JSONField(null=True, editable=False)
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
+    followers_count = models.PositiveIntegerField(default=0, editable=False)
+    following_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ProfileQuerySet.as_manager()
+
+    # Maintained with adjust_counter only, never by saving the profile
+    counter_fields = ('posts_count', 'followers_count', 'following_count')
 
     class Meta:
         ordering = ['-created_at']
 
+    def save(self, *args, **kwargs):
+        exclude_from_save(
+            self, kwargs, (*self.counter_fields, *self.pipeline_fields())
+        )
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.owner}'s profile"
 
@@ -31,4 +100,39 @@ def create_profile(sender, instance, created, **kwargs):
         Profile.objects.create(owner=instance)
 
 
+def invalidate_user(sender, instance, **kwargs):
+    update_fields = kwargs.get('update_fields')
+    if update_fields and set(update_fields) <= {'last_login'}:
+        # Logging in does not change anything read from request.user
+        return
+    invalidate_cached_user(instance.pk)
+
+
+def invalidate_profile_owner(sender, instance, **kwargs):
+    invalidate_cached_user(instance.owner_id)
+
+
+def invalidate_stored_image_owner(sender, pk, **kwargs):
+    owner_id = Profile.objects.filter(pk=pk).values_list(
+        'owner_id', flat=True
+    ).first()
+    if owner_id is not None:
+        invalidate_cached_user(owner_id)
+
+
 post_save.connect(create_profile, sender=User)
+# Users cached by drf_api.authentication
+post_save.connect(
+    invalidate_user, sender=User, dispatch_uid='cached-user-save'
+)
+post_delete.connect(
+    invalidate_user, sender=User, dispatch_uid='cached-user-delete'
+)
+post_save.connect(
+    invalidate_profile_owner, sender=Profile,
+    dispatch_uid='cached-user-profile-save',
+)
+image_stored.connect(
+    invalidate_stored_image_owner, sender=Profile,
+    dispatch_uid='cached-user-profile-image',
+)
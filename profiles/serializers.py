@@ -1,21 +1,33 @@
 from rest_framework import serializers
+from drf_api.fieldsets import SparseFieldsMixin
+from drf_api.images import DeferredImageMixin, ImageSrcsetField
 from .models import Profile
 from followers.models import Follower
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(
+    SparseFieldsMixin, DeferredImageMixin, serializers.ModelSerializer
+):
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
     following_id = serializers.SerializerMethodField()
-    posts_count = serializers.SerializerMethodField()
-    followers_count = serializers.SerializerMethodField()
-    following_count = serializers.SerializerMethodField()
+    posts_count = serializers.ReadOnlyField()
+    followers_count = serializers.ReadOnlyField()
+    following_count = serializers.ReadOnlyField()
+    image_srcset = ImageSrcsetField(source='image_variants')
+    image_status = serializers.ReadOnlyField()
 
     def get_is_owner(self, obj):
         request = self.context['request']
-        return request.user == obj.owner
+        return request.user.pk == obj.owner_id
 
     def get_following_id(self, obj):
+        """
+        Use the following_id annotated by ProfileQuerySet.with_viewer_state
+        when available, only querying for profiles that were not annotated.
+        """
+        if hasattr(obj, 'following_id'):
+            return obj.following_id
         user = self.context['request'].user
         if user.is_authenticated:
             following = Follower.objects.filter(
@@ -24,15 +36,6 @@ class ProfileSerializer(serializers.ModelSerializer):
             return following.id if following else None
         return None
 
-    def get_posts_count(self, obj):
-        return obj.owner.post_set.count()
-
-    def get_followers_count(self, obj):
-        return Follower.objects.filter(followed=obj.owner).count()
-
-    def get_following_count(self, obj):
-        return Follower.objects.filter(owner=obj.owner).count()
-
     def validate_content(self, value):
         """
         Validate that the content does not exceed 250 characters
@@ -47,6 +50,7 @@ class ProfileSerializer(serializers.ModelSerializer):
         model = Profile
         fields = [
             'id', 'owner', 'created_at', 'updated_at', 'name',
-            'content', 'image', 'is_owner', 'following_id',
+            'content', 'image', 'image_srcset', 'image_status', 'is_owner',
+            'following_id',
             'posts_count', 'followers_count', 'following_count'
         ]
@@ -1,3 +1,143 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase
+from bookmarks.models import Bookmark, BookmarkFolder
+from followers.models import Follower
+from likes.models import Like
+from posts.models import Post
+from .models import Profile
 
-# Create your tests here.
+
+class ProfileViewTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.client.force_authenticate(user=self.user)
+
+    def test_profile_list_loads_in_a_fixed_number_of_queries(self):
+        for index in range(10):
+            other = User.objects.create_user(username=f'user{index}')
+            Post.objects.create(owner=other, title='a title')
+            Follower.objects.create(owner=self.user, followed=other)
+        # page count, profiles with owners and following_id
+        with self.assertNumQueries(2):
+            response = self.client.get('/profiles/', secure=True)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        followed = response.data['results'][0]
+        self.assertEqual(followed['posts_count'], 1)
+        self.assertEqual(followed['followers_count'], 1)
+        self.assertIsNotNone(followed['following_id'])
+
+    def test_profile_detail_loads_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                f'/profiles/{self.user.profile.id}/', secure=True
+            )
+        self.assertEqual(response.data['following_count'], 0)
+
+    def test_etag_changes_when_the_profile_is_followed_again(self):
+        other = User.objects.create_user(username='eve')
+        url = f'/profiles/{other.profile.id}/'
+        Follower.objects.create(owner=self.user, followed=other)
+        etag = self.client.get(url, secure=True)['ETag']
+        Follower.objects.get().delete()
+        follow = Follower.objects.create(owner=self.user, followed=other)
+        response = self.client.get(url, secure=True, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['following_id'], follow.id)
+
+
+class ProfileCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.other = User.objects.create_user(username='brian', password='x')
+
+    def test_posts_count_follows_post_writes(self):
+        post = Post.objects.create(owner=self.user, title='a title')
+        self.assertEqual(Profile.objects.get(owner=self.user).posts_count, 1)
+        post.delete()
+        self.assertEqual(Profile.objects.get(owner=self.user).posts_count, 0)
+
+    def test_drifted_counters_are_repaired(self):
+        Post.objects.create(owner=self.user, title='a title')
+        Follower.objects.create(owner=self.user, followed=self.other)
+        Profile.objects.update(
+            posts_count=5, followers_count=5, following_count=5
+        )
+        out = StringIO()
+        call_command('sync_profile_counters', stdout=out)
+        self.assertIn('Repaired 2 drifted profile(s)', out.getvalue())
+        profile = Profile.objects.get(owner=self.user)
+        self.assertEqual(profile.posts_count, 1)
+        self.assertEqual(profile.followers_count, 0)
+        self.assertEqual(profile.following_count, 1)
+
+    def test_editing_a_profile_keeps_concurrent_follows(self):
+        profile = Profile.objects.get(owner=self.user)
+        # Followed after the profile was loaded for the edit
+        Follower.objects.create(owner=self.other, followed=self.user)
+        profile.name = 'Adam'
+        profile.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.name, 'Adam')
+        self.assertEqual(profile.followers_count, 1)
+
+
+class ViewerStateTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='adam', password='pass')
+        self.other = User.objects.create_user(username='brian', password='x')
+        self.posts = [
+            Post.objects.create(owner=self.other, title=f'post {i}')
+            for i in range(3)
+        ]
+        self.client.force_authenticate(self.user)
+
+    def get_state(self, post_ids, profile_ids):
+        return self.client.get(
+            '/me/state/',
+            {
+                'posts': ','.join(map(str, post_ids)),
+                'profiles': ','.join(map(str, profile_ids)),
+            },
+            secure=True,
+        )
+
+    def test_returns_like_bookmark_and_follow_state(self):
+        first, second, _ = self.posts
+        like = Like.objects.create(owner=self.user, post=first)
+        folder = BookmarkFolder.objects.create(owner=self.user, name='saved')
+        Bookmark.objects.create(owner=self.user, post=second, folder=folder)
+        follow = Follower.objects.create(owner=self.user, followed=self.other)
+        profile = Profile.objects.get(owner=self.other)
+
+        response = self.get_state([first.id, second.id], [profile.id])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['posts'], [
+            {'id': first.id, 'like_id': like.id, 'bookmark_folder_ids': []},
+            {
+                'id': second.id, 'like_id': None,
+                'bookmark_folder_ids': [folder.id],
+            },
+        ])
+        self.assertEqual(
+            response.data['profiles'],
+            [{'id': profile.id, 'following_id': follow.id}],
+        )
+
+    def test_query_count_does_not_grow_with_ids(self):
+        profile_ids = list(Profile.objects.values_list('id', flat=True))
+        self.get_state([self.posts[0].id], profile_ids[:1])
+        with self.assertNumQueries(3):
+            self.get_state([post.id for post in self.posts], profile_ids)
+
+    def test_requires_at_least_one_id(self):
+        response = self.client.get('/me/state/', secure=True)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_logged_out_users_are_rejected(self):
+        self.client.force_authenticate(None)
+        response = self.get_state([self.posts[0].id], [])
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
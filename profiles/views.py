@@ -1,8 +1,12 @@
-from django.db.models import Count
 from rest_framework import generics, filters, status
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.response import Response
 from django.middleware.csrf import rotate_token
+from drf_api.cache import AnonymousResponseCacheMixin
+from drf_api.conditional import (
+    ConditionalRetrieveMixin, LastModifiedListMixin
+)
+from drf_api.fieldsets import selected_fields
 from drf_api.permissions import IsOwnerOrReadOnly
 from .models import Profile
 from .serializers import ProfileSerializer
@@ -16,18 +20,23 @@ JWT_AUTH_REFRESH_COOKIE = getattr(settings, 'JWT_AUTH_REFRESH_COOKIE', None)
 JWT_AUTH_SAMESITE = getattr(settings, 'JWT_AUTH_SAMESITE', 'None')
 JWT_AUTH_SECURE = getattr(settings, 'JWT_AUTH_SECURE', True)
 
+# Models rendered by ProfileSerializer, see drf_api.cache
+PROFILE_CACHE_MODELS = (
+    'profiles.Profile', 'posts.Post', 'followers.Follower', 'auth.User',
+)
 
-class ProfileList(generics.ListAPIView):
+
+class ProfileList(
+    AnonymousResponseCacheMixin, LastModifiedListMixin,
+    generics.ListAPIView
+):
     """
     List all profiles.
     No create view as profile creation is handled by django signals.
     """
-    queryset = Profile.objects.annotate(
-        posts_count=Count('owner__post', distinct=True),
-        followers_count=Count('owner__followed', distinct=True),
-        following_count=Count('owner__following', distinct=True)
-    ).order_by('-created_at')
+    queryset = Profile.objects.order_by('-created_at')
     serializer_class = ProfileSerializer
+    cache_models = PROFILE_CACHE_MODELS
     filter_backends = [
         filters.OrderingFilter,
         DjangoFilterBackend,
@@ -44,19 +53,50 @@ class ProfileList(generics.ListAPIView):
         'owner__followed__created_at',
     ]
 
+    def get_queryset(self):
+        """
+        Resolves the viewer's following_id for every profile in the same
+        query, unless the requested fields leave it out.
+        """
+        return super().get_queryset().for_display(
+            self.request.user,
+            selected_fields(self.request, ProfileSerializer),
+        )
+
 
-class ProfileDetail(generics.RetrieveUpdateDestroyAPIView):
+class ProfileDetail(
+    AnonymousResponseCacheMixin, ConditionalRetrieveMixin,
+    generics.RetrieveUpdateDestroyAPIView
+):
     """
     Retrieve, update or delete a profile if you're the owner.
     """
     permission_classes = [IsOwnerOrReadOnly]
-    queryset = Profile.objects.annotate(
-        posts_count=Count('owner__post', distinct=True),
-        followers_count=Count('owner__followed', distinct=True),
-        following_count=Count('owner__following', distinct=True)
-    ).order_by('-created_at')
+    cache_models = PROFILE_CACHE_MODELS
+    etag_fields = (
+        'updated_at', 'posts_count', 'followers_count', 'following_count',
+        'owner__username', 'following_id',
+    )
+    etag_field_sources = {
+        'owner__username': ('owner',),
+        'following_id': ('following_id',),
+    }
+    queryset = Profile.objects.order_by('-created_at')
     serializer_class = ProfileSerializer
 
+    def get_queryset(self):
+        """
+        Resolves the viewer's following_id in the same query, unless the
+        requested fields leave it out.
+        """
+        return super().get_queryset().for_display(
+            self.request.user,
+            selected_fields(self.request, ProfileSerializer),
+        )
+
+    def get_etag_queryset(self):
+        return Profile.objects.with_viewer_state(self.request.user)
+
     def destroy(self, request, *args, **kwargs):
         """
         Custom destroy method to handle user account deletion